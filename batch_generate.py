@@ -0,0 +1,258 @@
+"""Headless batch resume generation.
+
+Reads descriptions from a JSONL or CSV file, runs each one through the same
+prompt -> LLM -> JSON -> HTML pipeline as the Streamlit app and writes
+<id>.html and <id>.json into the output directory.
+
+Progress is recorded in <out>/checkpoint.jsonl, so re-running the same command
+after a crash only processes the records that have not completed yet; records
+that came back with sections missing are retried too. Unreadable input lines are
+logged and skipped, and a repeated id gets a numeric suffix (jane, jane-2).
+
+Usage:
+    python -m batch_generate descriptions.jsonl --out resumes/ --workers 4
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from streamlit_app import (
+    describe_layout,
+    fit_to_one_page,
+    generate_html_resume,
+    generate_resume_data_shared,
+    get_pdf_renderer,
+    get_resume_cache,
+    log_notify,
+    resume_cache_key,
+    validate_resume,
+    MAX_RETRIES,
+)
+
+logger = logging.getLogger("batch_generate")
+
+DESCRIPTION_FIELDS = ("description", "user_input", "text")
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+
+def _read_rows(handle, path):
+    """Yield (line_number, row) for each record; row is None for a JSONL line that isn't valid JSON"""
+    if path.lower().endswith(".csv"):
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning("Skipping line %d: invalid JSON (%s)", line_number, e)
+            yield line_number, None
+
+
+def read_records(path):
+    """Yield (record_id, description) pairs from a JSONL or CSV file, logging and skipping unusable lines"""
+    seen = set()
+    with open(path, newline="", encoding="utf-8") as handle:
+        for record_number, (line_number, row) in enumerate(_read_rows(handle, path), start=1):
+            if row is None:
+                continue
+            if isinstance(row, str):
+                row = {"description": row}
+            elif not isinstance(row, dict):
+                logger.warning("Skipping line %d: expected an object or a string, got %s", line_number,
+                               type(row).__name__)
+                continue
+
+            description = next((row[field] for field in DESCRIPTION_FIELDS
+                                if isinstance(row.get(field), str) and row[field].strip()), None)
+            if not description:
+                logger.warning("Skipping line %d: no description field", line_number)
+                continue
+
+            record_id = safe_record_id(str(row.get("id") or f"{record_number:05d}"))
+            if record_id in seen:
+                # Outputs are named by id, so a repeated one would overwrite the earlier record's files
+                suffix = 2
+                while f"{record_id}-{suffix}" in seen:
+                    suffix += 1
+                logger.warning("Line %d: id %s is already used, saving as %s-%d", line_number, record_id,
+                               record_id, suffix)
+                record_id = f"{record_id}-{suffix}"
+            seen.add(record_id)
+            yield record_id, description
+
+
+def safe_record_id(record_id):
+    """Make a record id safe to use as a file name"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", record_id).strip("._") or "record"
+
+
+def load_checkpoint(out_dir):
+    """Return the ids already completed in a previous run"""
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+
+    completed = set()
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a torn last line
+                continue
+            if entry.get("status") == "ok":
+                completed.add(entry["id"])
+    return completed
+
+
+def write_atomic(path, content):
+    """Write text or bytes via a temp file and rename so a crash never leaves a half-written output"""
+    tmp_path = path + ".tmp"
+    if isinstance(content, bytes):
+        handle = open(tmp_path, "wb")
+    else:
+        handle = open(tmp_path, "w", encoding="utf-8")
+    with handle:
+        handle.write(content)
+    os.replace(tmp_path, path)
+
+
+class Checkpoint:
+    """Append-only, fsynced log of finished records shared by the worker threads"""
+
+    def __init__(self, out_dir):
+        self.handle = open(os.path.join(out_dir, CHECKPOINT_FILE), "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def record(self, record_id, status, error=None):
+        entry = {"id": record_id, "status": status}
+        if error:
+            entry["error"] = error
+        with self.lock:
+            self.handle.write(json.dumps(entry) + "\n")
+            self.handle.flush()
+            os.fsync(self.handle.fileno())
+
+    def close(self):
+        self.handle.close()
+
+
+def process_record(record_id, description, out_dir, mode, max_retries, use_cache, strict=False, pdf_renderer=None):
+    """Generate, validate, render and save one resume; returns the sections the LLM left out"""
+
+    def notify(level, message):
+        log_notify(level, f"[{record_id}] {message}")
+
+    cache = get_resume_cache() if use_cache else None
+    cache_key = resume_cache_key(description)
+    resume_data = cache.get(cache_key) if cache else None
+    missing = []
+
+    if resume_data is None:
+        resume_data, missing = generate_resume_data_shared(description, mode, notify, max_retries)
+        if missing:
+            notify("warning", f"Partial resume, missing sections: {', '.join(missing)}")
+        elif cache:
+            cache.set(cache_key, resume_data)
+    else:
+        notify("info", "Loaded from cache")
+
+    resume, issues = validate_resume(resume_data)
+    if issues:
+        if strict:
+            raise ValueError(f"Malformed resume data: {'; '.join(issues[:5])}")
+        notify("warning", f"Repaired {len(issues)} malformed field(s): {'; '.join(issues[:5])}")
+
+    write_atomic(os.path.join(out_dir, f"{record_id}.json"), json.dumps(resume.to_dict(), indent=2))
+    layout, _ = fit_to_one_page(resume)
+    changes = describe_layout(layout, resume)
+    if changes:
+        notify("info", f"Fitted to one page: {', '.join(changes)}")
+    html_content = generate_html_resume(resume, layout)
+    write_atomic(os.path.join(out_dir, f"{record_id}.html"), html_content)
+    if pdf_renderer is not None:
+        write_atomic(os.path.join(out_dir, f"{record_id}.pdf"), pdf_renderer.render(html_content))
+    return missing
+
+
+def run_batch(input_path, out_dir, workers=4, mode="sequential", max_retries=MAX_RETRIES, use_cache=True, strict=False,
+              pdf=False):
+    """Process every pending record with a bounded worker pool; returns (succeeded, partial, failed) counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    pdf_renderer = None
+    if pdf:
+        pdf_renderer = get_pdf_renderer()
+        if pdf_renderer is None:
+            raise SystemExit("--pdf needs WeasyPrint and its Pango system libraries: pip install weasyprint")
+
+    completed = load_checkpoint(out_dir)
+    pending = [(record_id, text) for record_id, text in read_records(input_path) if record_id not in completed]
+    logger.info("%d records pending, %d already completed", len(pending), len(completed))
+
+    checkpoint = Checkpoint(out_dir)
+    succeeded = partial = failed = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            futures = {
+                executor.submit(
+                    process_record, record_id, text, out_dir, mode, max_retries, use_cache, strict, pdf_renderer
+                ): record_id
+                for record_id, text in pending
+            }
+            for future in as_completed(futures):
+                record_id = futures[future]
+                try:
+                    missing = future.result()
+                    if missing:
+                        # Saved, but not "ok": the next run tries the record again
+                        checkpoint.record(record_id, "partial", f"missing sections: {', '.join(missing)}")
+                        partial += 1
+                    else:
+                        checkpoint.record(record_id, "ok")
+                        succeeded += 1
+                except Exception as e:
+                    logger.error("[%s] failed: %s", record_id, e)
+                    checkpoint.record(record_id, "failed", str(e)[:200])
+                    failed += 1
+    finally:
+        checkpoint.close()
+
+    logger.info("Done: %d succeeded, %d partial, %d failed", succeeded, partial, failed)
+    return succeeded, partial, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate resumes in bulk from a JSONL or CSV file of descriptions")
+    parser.add_argument("input", help="JSONL (one string or object per line) or CSV with a description column")
+    parser.add_argument("--out", default="batch_output", help="Output directory for HTML/JSON files and the checkpoint")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent generations (default 4)")
+    parser.add_argument("--mode", choices=("sequential", "hedged", "sections"), default="sequential",
+                        help="Provider strategy: sequential failover, hedged racing or parallel per-section requests")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Attempts per record")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the LLM, ignoring cached resumes")
+    parser.add_argument("--strict", action="store_true",
+                        help="Fail records with malformed resume data instead of repairing them")
+    parser.add_argument("--pdf", action="store_true", help="Also write <id>.pdf (requires WeasyPrint)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    _, _, failed = run_batch(args.input, args.out, args.workers, args.mode, args.retries, not args.no_cache, args.strict,
+                          args.pdf)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Benchmark industry detection against the substring matcher it replaced.
+
+Runs a labelled corpus of role descriptions through
+ATSKeywordExtractor.get_industry_keywords and through the previous
+implementation, kept below as legacy_get_industry_keywords, and reports how
+many each classifies correctly and the time per description. The corpus
+includes the words the substring matcher misread ("maintain" as AI, "database"
+as data science, "development" as PM) and plural job titles.
+
+Usage:
+    python -m bench_industry_detection
+    python -m bench_industry_detection --repeat 1000 --runs 9 --show-misses
+"""
+
+import argparse
+import sys
+import time
+
+from streamlit_app import INDUSTRY_KEYWORDS, ATSKeywordExtractor
+
+# (description, expected industry)
+CORPUS = (
+    ("Senior backend engineer, 6 years of Go, Kafka and PostgreSQL", "software_engineering"),
+    ("Full-stack developer building React and Node.js apps for startups", "software_engineering"),
+    ("Frontend specialist who maintains a design system used by 40 teams", "software_engineering"),
+    ("Database administrator, 8 years of PostgreSQL tuning, replication and backups", "software_engineering"),
+    ("Mobile app development with Swift and Kotlin, 5 years", "software_engineering"),
+    ("Team of software engineers migrating a monolith to microservices", "software_engineering"),
+    ("Data scientist with 4 years of NLP and deep learning", "data_science"),
+    ("Machine learning engineer shipping recommendation models to production", "data_science"),
+    ("Analytics lead running dashboards and experimentation for a retailer", "data_science"),
+    ("Computer vision researchers and data scientists for an autonomous driving lab", "data_science"),
+    ("Digital marketing manager running SEO and SEM campaigns", "marketing"),
+    ("Social media strategist for consumer brands, 3 years", "marketing"),
+    ("Content marketing specialist writing long-form guides and newsletters", "marketing"),
+    ("Business analyst gathering requirements for banking clients", "business_analyst"),
+    ("Business analysts supporting an ERP rollout in manufacturing", "business_analyst"),
+    ("Senior BA focused on business analysis and process improvement in insurance", "business_analyst"),
+    ("Product manager for a B2B payments platform", "product_management"),
+    ("PMs and product owners in fintech, 7 years", "product_management"),
+    ("Product owner who owns the roadmap for a mobile banking app", "product_management"),
+    ("Product managers running quarterly roadmap reviews", "product_management"),
+)
+
+
+def legacy_get_industry_keywords(user_input):
+    """The substring matcher get_industry_keywords replaced, kept as the comparison baseline"""
+    user_input_lower = user_input.lower()
+
+    # It rebuilt the keyword tables as fresh lists on every call
+    keywords = {
+        industry: {category: list(terms) for category, terms in tables.items()}
+        for industry, tables in INDUSTRY_KEYWORDS.items()
+    }
+
+    if any(word in user_input_lower for word in ["software", "developer", "engineer", "programming", "coding"]):
+        return keywords["software_engineering"]
+    elif any(word in user_input_lower for word in ["data", "machine learning", "ml", "ai", "analytics"]):
+        return keywords["data_science"]
+    elif any(word in user_input_lower for word in ["marketing", "digital marketing", "seo", "social media"]):
+        return keywords["marketing"]
+    elif any(word in user_input_lower for word in ["business analyst", "ba", "requirements"]):
+        return keywords["business_analyst"]
+    elif any(word in user_input_lower for word in ["product manager", "pm", "product"]):
+        return keywords["product_management"]
+    else:
+        return keywords["software_engineering"]  # Default
+
+
+def industry_of(keywords):
+    """Map a keyword table, current or legacy, back to its industry name"""
+    for industry, tables in INDUSTRY_KEYWORDS.items():
+        if list(keywords["technical"]) == list(tables["technical"]):
+            return industry
+    raise ValueError("Unknown keyword table")
+
+
+def misclassified(get_keywords):
+    """[(description, expected, got), ...] for every corpus entry the function gets wrong"""
+    misses = []
+    for text, expected in CORPUS:
+        got = industry_of(get_keywords(text))
+        if got != expected:
+            misses.append((text, expected, got))
+    return misses
+
+
+def time_per_description(get_keywords, repeat=200, runs=7):
+    """Best of `runs` passes over the corpus `repeat` times, in microseconds per description"""
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for text, _ in CORPUS:
+                get_keywords(text)
+        best = min(best, time.perf_counter() - started)
+    return best / (repeat * len(CORPUS)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark industry detection on a labelled corpus")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the corpus per timed run (default 200)")
+    parser.add_argument("--runs", type=int, default=7, help="Timed runs, best one reported (default 7)")
+    parser.add_argument("--show-misses", action="store_true", help="List the descriptions each matcher gets wrong")
+    args = parser.parse_args(argv)
+
+    print(f"{'matcher':<10} {'correct':>9} {'us/description':>15}")
+    for name, get_keywords in (("current", ATSKeywordExtractor.get_industry_keywords),
+                               ("legacy", legacy_get_industry_keywords)):
+        misses = misclassified(get_keywords)
+        micros = time_per_description(get_keywords, args.repeat, args.runs)
+        print(f"{name:<10} {len(CORPUS) - len(misses):>4}/{len(CORPUS):<4} {micros:>15.2f}")
+        if args.show_misses:
+            for text, expected, got in misses:
+                print(f"    {text!r}: expected {expected}, got {got}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Benchmark the JSON scanner against the regex-based parser it replaced.
+
+Times parse_json_response on pathological LLM responses (long prose, unbalanced
+braces, unclosed code fences, truncated output) at growing sizes, next to the
+previous implementation kept below as legacy_parse_json_response. The scanner
+should grow linearly with the input; the legacy parser is quadratic on several
+of these. Also reports fuzzed responses where the legacy parser found a resume
+and the scanner did not (expected to be 0).
+
+Usage:
+    python -m bench_json_extraction
+    python -m bench_json_extraction --sizes 1000 4000 16000 --fuzz 5000 --skip-legacy
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+from mock_llm_server import SAMPLE_RESUME
+from streamlit_app import parse_json_response
+
+RESUME_JSON = json.dumps(SAMPLE_RESUME, indent=2)
+
+# Hostile response shapes, each built from a repeat count so scaling can be measured
+PATHOLOGICAL = {
+    "prose then json": lambda n: "lorem ipsum dolor " * n + RESUME_JSON,
+    "prose, no json": lambda n: "lorem ipsum dolor " * n,
+    "unbalanced braces": lambda n: "{ " * n + "prose",
+    "unclosed keys": lambda n: '{"a' * n,
+    "many small objects": lambda n: '{"a": {"b": 1}} ' * n,
+    "repeated fences": lambda n: '```json\n{"a": 1}\n```\n' * n,
+    "unclosed fences": lambda n: "```json {" * n,
+    "truncated string": lambda n: '{"contact": {"name": "' + "x" * (20 * n),
+    "empty objects": lambda n: "{}" * n,
+}
+
+# Responses the fuzzer mutates: the shapes models actually return
+FUZZ_SEEDS = (
+    RESUME_JSON,
+    "```json\n" + RESUME_JSON + "\n```",
+    "Sure! Here's your resume:\n```json\n" + RESUME_JSON + "\n```\nLet me know {if} you need changes.",
+    "Use {curly braces wisely. " + RESUME_JSON,
+    '{"note": 1} then ' + RESUME_JSON,
+    "```\n```json\n" + RESUME_JSON + "\n```\n```",
+)
+FUZZ_INSERTS = ("{", "}", '"', "```", "\\", "x")
+
+
+def legacy_parse_json_response(response_text):
+    """The regex-based parser parse_json_response replaced, kept as the comparison baseline"""
+    try:
+        return json.loads(response_text.strip())
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        cleaned = re.sub(r'```json\s*', '', response_text)
+        cleaned = re.sub(r'```\s*', '', cleaned)
+        return json.loads(cleaned.strip())
+    except json.JSONDecodeError:
+        pass
+
+    json_patterns = [
+        r'```json\s*(\{.*?\})\s*```',
+        r'```\s*(\{.*?\})\s*```',
+        r'(\{[^{}]*\{[^{}]*\}[^{}]*\})',
+        r'(\{.*\})',
+    ]
+    for pattern in json_patterns:
+        for match in re.finditer(pattern, response_text, re.DOTALL):
+            try:
+                parsed = json.loads(match.group(1).strip())
+                if isinstance(parsed, dict) and 'contact' in parsed:
+                    return parsed
+            except (json.JSONDecodeError, IndexError):
+                continue
+
+    try:
+        start = response_text.find('{')
+        end = response_text.rfind('}')
+        if start != -1 and end != -1 and end > start:
+            parsed = json.loads(response_text[start:end + 1])
+            if isinstance(parsed, dict):
+                return parsed
+    except json.JSONDecodeError:
+        pass
+
+    raise ValueError("Could not extract valid JSON from response. The AI may have returned malformed data.")
+
+
+def try_parse(parser, text):
+    """Parser result, or None when it raises ValueError"""
+    try:
+        return parser(text)
+    except ValueError:
+        return None
+
+
+def mutate(rng, text, max_edits=3):
+    """Insert up to `max_edits` JSON-significant fragments at random positions"""
+    for _ in range(rng.randint(0, max_edits)):
+        pos = rng.randrange(len(text))
+        text = text[:pos] + rng.choice(FUZZ_INSERTS) + text[pos:]
+    return text
+
+
+def fuzz_cases(count, seed=3):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield mutate(rng, rng.choice(FUZZ_SEEDS))
+
+
+def time_parse(parser, text, repeats=3):
+    """Best wall time of `repeats` runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        try_parse(parser, text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def count_regressions(count, seed=3):
+    """Fuzzed responses where the legacy parser found a resume and the scanner did not"""
+    regressions = 0
+    for text in fuzz_cases(count, seed):
+        legacy = try_parse(legacy_parse_json_response, text)
+        if isinstance(legacy, dict) and "contact" in legacy:
+            current = try_parse(parse_json_response, text)
+            if not (isinstance(current, dict) and "contact" in current):
+                regressions += 1
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction on pathological LLM responses")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000],
+                        help="Repeat counts for each pathological input (default 1000 2000 4000)")
+    parser.add_argument("--fuzz", type=int, default=2000, help="Fuzzed responses to compare (default 2000)")
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="Don't time the legacy parser (it takes minutes on the larger sizes)")
+    args = parser.parse_args(argv)
+
+    print(f"{'input':<20} {'size':>8} {'chars':>9} {'scanner ms':>11} {'legacy ms':>11}")
+    for name, build in PATHOLOGICAL.items():
+        for size in args.sizes:
+            text = build(size)
+            current = time_parse(parse_json_response, text) * 1000
+            legacy = "-" if args.skip_legacy else f"{time_parse(legacy_parse_json_response, text, 1) * 1000:.2f}"
+            print(f"{name:<20} {size:>8} {len(text):>9} {current:>11.2f} {legacy:>11}")
+
+    if args.fuzz:
+        print(f"\nfuzz: {count_regressions(args.fuzz)} of {args.fuzz} responses lost a resume the legacy parser found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Reproducible load test of the generation pipeline.
+
+Starts the local mock provider (mock_llm_server.py) unless --url points at a
+running one, routes every provider to it and pushes N distinct descriptions
+through the same JobQueue the app uses, with at most --concurrency in flight
+and the client-side provider limits raised unless configured. Reports
+throughput, p50/p95/p99 latency, retries, provider failovers and jobs that
+ended in the fallback resume. With --seed the mock server draws each request's
+latency and fault from the seed and the request itself, so the same request
+gets the same outcome in every run, whatever order concurrent requests arrive
+in. Choices that depend on timing (failover order, hedging, deadlines) can
+still send different requests, so compare runs by their distributions rather
+than expecting identical numbers.
+
+Usage:
+    python -m load_test --requests 50 --concurrency 8 --latency 1.5 --rate-500 0.1 --seed 7
+    python -m load_test --url http://127.0.0.1:8089/v1/chat/completions --mode hedged --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_llm_server import add_server_arguments, server_from_args
+
+logger = logging.getLogger("load_test")
+
+PROVIDERS = ("sambanova", "together", "openai")
+
+# Client-side limits for the run unless configured: the stub has no quota, and the app's
+# defaults (60 requests a minute) would otherwise measure the token bucket, not the pipeline
+LOAD_TEST_LIMITS = {"REQUESTS_PER_MINUTE": "100000", "MAX_CONCURRENCY": "1000"}
+
+ROLES = (
+    "backend engineer with 4 years of Python, Django and PostgreSQL",
+    "data scientist with 3 years of pandas, scikit-learn and A/B testing",
+    "frontend developer with 5 years of React, TypeScript and design systems",
+    "DevOps engineer with 6 years of AWS, Terraform and Kubernetes",
+    "product manager with 7 years in B2B SaaS and analytics",
+)
+
+
+def descriptions(count):
+    """Distinct descriptions, so neither the resume cache nor single-flight hides any request"""
+    for index in range(count):
+        yield f"Load test candidate #{index}: {ROLES[index % len(ROLES)]}, seeking a senior role"
+
+
+def point_providers_at(url):
+    """Route every provider to the stub and give each a dummy key and generous limits unless configured"""
+    for name in PROVIDERS:
+        os.environ[f"{name.upper()}_API_URL"] = url
+        os.environ.setdefault(f"{name.upper()}_API_KEY", "load-test")
+        for setting, value in LOAD_TEST_LIMITS.items():
+            os.environ.setdefault(f"{name.upper()}_{setting}", value)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers; 0.0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def summarize_latencies(values):
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(max(values, default=0.0), 3)
+    }
+
+
+def run_load(count, concurrency, mode="sequential"):
+    """Run `count` generations through a fresh JobQueue and return a summary dict"""
+    # Imported here so the provider URLs are set before the clients read them
+    from streamlit_app import JobQueue, ResumeCache
+
+    queue = JobQueue(ResumeCache(), workers=concurrency)
+    # The queue alone doesn't bound the load: in the async modes a worker is free again while
+    # its LLM calls are in flight. Each job holds a slot from submission until it is done.
+    slots = threading.Semaphore(concurrency)
+
+    def release_when_done(job):
+        job.wait()
+        slots.release()
+
+    jobs = []
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-test") as waiters:
+            for text in descriptions(count):
+                slots.acquire()
+                job = queue.submit(text, mode, use_cache=False)
+                jobs.append(job)
+                waiters.submit(release_when_done, job)
+    finally:
+        queue.close()
+    elapsed = time.perf_counter() - started
+
+    generation, end_to_end = [], []
+    retries = failovers = partial = 0
+    for job in jobs:
+        end_to_end.append(job.updated - job.created)
+        for stage, seconds, labels in job.timings:
+            if stage == "generation":
+                generation.append(seconds)
+            elif stage == "retry_wait":
+                # One per retried attempt, including a single section group's retry in sections mode
+                retries += 1
+            elif stage in ("llm_attempt", "limit_wait") and labels.get("outcome") == "error":
+                # A wait for the client's own rate or concurrency limit that runs out fails over too
+                failovers += 1
+        if job.missing:
+            partial += 1
+
+    failed = sum(job.status == "failed" for job in jobs)
+    return {
+        "mode": mode,
+        "requests": count,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(count / elapsed, 3) if elapsed else 0.0,
+        "generation_seconds": summarize_latencies(generation),
+        "end_to_end_seconds": summarize_latencies(end_to_end),
+        "retries": retries,
+        "failed_provider_attempts": failovers,
+        "partial_resumes": partial,
+        "fallback_jobs": failed
+    }
+
+
+def format_report(summary):
+    lines = [
+        f"{summary['requests']} generations ({summary['mode']}) at concurrency {summary['concurrency']} "
+        f"in {summary['elapsed_seconds']}s: {summary['throughput_per_second']}/s"
+    ]
+    for name in ("generation_seconds", "end_to_end_seconds"):
+        stats = summary[name]
+        lines.append(f"  {name:<20} p50 {stats['p50']}s  p95 {stats['p95']}s  p99 {stats['p99']}s  max {stats['max']}s")
+    lines.append(
+        f"  retries {summary['retries']}, failed provider attempts {summary['failed_provider_attempts']}, "
+        f"partial {summary['partial_resumes']}, fallback {summary['fallback_jobs']}"
+    )
+    if summary.get("mock_server"):
+        lines.append(f"  mock server: {summary['mock_server']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the resume pipeline against a mock LLM provider")
+    parser.add_argument("--requests", type=int, default=20, help="Generations to run (default 20)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Job queue workers (default 4)")
+    parser.add_argument("--mode", choices=("sequential", "hedged", "sections", "stream"), default="sequential",
+                        help="Generation mode, as in the app (default sequential)")
+    parser.add_argument("--url", help="Use an already running provider instead of starting the mock server")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    server = None
+    url = args.url
+    if url is None:
+        server = server_from_args(args).start()
+        url = server.url
+    point_providers_at(url)
+
+    try:
+        summary = run_load(args.requests, args.concurrency, args.mode)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    if server is not None:
+        summary["mock_server"] = dict(server.stats)
+
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary))
+    return 1 if summary["fallback_jobs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
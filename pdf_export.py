@@ -0,0 +1,179 @@
+"""PDF export for generated resumes.
+
+Documents are rendered by a pool of worker processes. Each worker imports
+WeasyPrint once, parses the resume stylesheet once and lays out a warm-up page
+so fonts are loaded before the first real request; after that every document
+only pays for its own layout. Finished PDFs are cached by the hash of their HTML.
+
+WeasyPrint is optional (pip install weasyprint, plus its Pango system libraries).
+When it can't be imported, including when the package is installed but the
+libraries are missing, PDF_AVAILABLE is False and the app keeps offering HTML only.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _weasyprint_importable():
+    """Whether WeasyPrint imports; it loads Pango when imported, so an installed package alone isn't enough"""
+    try:
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+PDF_AVAILABLE = _weasyprint_importable()
+
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_CACHE_SIZE = int(os.environ.get("PDF_CACHE_SIZE", "64"))
+# Optional directory that keeps rendered PDFs across restarts
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR")
+PDF_TIMEOUT = 60
+
+_WARM_UP_HTML = "<html><body><p>Warm-up</p></body></html>"
+
+# Per-process renderer state, filled in by _init_worker
+_worker = {}
+
+
+class PDFExportError(Exception):
+    """PDF rendering is unavailable or failed"""
+
+
+def _init_worker(stylesheet, style_block):
+    """Import WeasyPrint and warm up fonts and the shared stylesheet once per worker process"""
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+
+    font_config = FontConfiguration()
+    _worker["HTML"] = HTML
+    _worker["font_config"] = font_config
+    _worker["style_block"] = style_block
+    _worker["stylesheets"] = [CSS(string=stylesheet, font_config=font_config)] if stylesheet else None
+
+    _render(_WARM_UP_HTML)
+
+
+def _render(html):
+    """Render one document in a worker, swapping an embedded copy of the shared CSS for the pre-parsed one"""
+    stylesheets = None
+    style_block = _worker["style_block"]
+    if style_block and style_block in html:
+        html = html.replace(style_block, "", 1)
+        stylesheets = _worker["stylesheets"]
+
+    document = _worker["HTML"](string=html)
+    return document.write_pdf(stylesheets=stylesheets, font_config=_worker["font_config"])
+
+
+def html_digest(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class PDFRenderer:
+    """Warm pool of WeasyPrint workers with an LRU cache of rendered PDFs keyed by HTML hash.
+
+    `stylesheet` is CSS shared by every document; when a document embeds it
+    verbatim as `style_block`, the workers use their pre-parsed copy instead.
+    """
+
+    def __init__(self, stylesheet="", style_block=None, workers=PDF_WORKERS,
+                 cache_size=PDF_CACHE_SIZE, cache_dir=PDF_CACHE_DIR):
+        if not PDF_AVAILABLE:
+            raise PDFExportError("WeasyPrint or its Pango system libraries are not installed (pip install weasyprint)")
+
+        # spawn keeps the workers independent of the parent's threads and event loops
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(stylesheet, style_block)
+        )
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.broken = None
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def render(self, html, timeout=PDF_TIMEOUT):
+        """Return PDF bytes for an HTML document, from the cache when possible"""
+        return self.render_many([html], timeout)[0]
+
+    def render_many(self, documents, timeout=PDF_TIMEOUT):
+        """Render several documents concurrently across the pool, preserving order"""
+        if self.broken:
+            raise PDFExportError(self.broken)
+
+        keys = [html_digest(html) for html in documents]
+        results = [self._cached(key) for key in keys]
+        futures = {
+            index: self.pool.submit(_render, html)
+            for index, html in enumerate(documents)
+            if results[index] is None
+        }
+
+        try:
+            for index, future in futures.items():
+                results[index] = future.result(timeout=timeout)
+                self._store(keys[index], results[index])
+        except BrokenProcessPool as e:
+            # Usually WeasyPrint's system libraries are missing; don't keep retrying
+            self.broken = f"PDF renderer could not start: {e}"
+            raise PDFExportError(self.broken) from e
+        except Exception as e:
+            raise PDFExportError(f"PDF rendering failed: {e}") from e
+
+        return results
+
+    def _cached(self, key):
+        with self.lock:
+            pdf = self.cache.get(key)
+            if pdf is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return pdf
+
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.pdf")
+            if os.path.exists(path):
+                with open(path, "rb") as handle:
+                    pdf = handle.read()
+                with self.lock:
+                    self._remember(key, pdf)
+                    self.hits += 1
+                return pdf
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, pdf):
+        with self.lock:
+            self._remember(key, pdf)
+
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.pdf")
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                handle.write(pdf)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, pdf):
+        self.cache[key] = pdf
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
@@ -0,0 +1,153 @@
+"""Typed resume records produced by validate_resume in streamlit_app, and the layout they render with.
+
+Streamlit re-executes the app script on every rerun, and building a slotted
+dataclass costs about a millisecond, so the record classes live in this module,
+which is imported once per process. That also keeps their identity stable for
+objects held in process-wide caches across reruns.
+"""
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+
+@dataclass(slots=True)
+class ContactInfo:
+    name: str = ""
+    email: str = ""
+    phone: str = ""
+    location: str = ""
+    linkedin: str = ""
+    github: str = ""
+    portfolio: str = ""
+
+
+@dataclass(slots=True)
+class ExperienceEntry:
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    duration: str = ""
+    achievements: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ProjectEntry:
+    title: str = ""
+    technologies: str = ""
+    duration: str = ""
+    github: str = ""
+    demo: str = ""
+    description: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class EducationEntry:
+    degree: str = ""
+    institution: str = ""
+    location: str = ""
+    graduation: str = ""
+    gpa: str = ""
+    relevant_coursework: list = field(default_factory=list)
+    honors: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ResumeModel:
+    """Validated resume: every field present with the right type, so rendering needs no defensive lookups"""
+    contact: ContactInfo = field(default_factory=ContactInfo)
+    professional_summary: str = ""
+    technical_skills: dict = field(default_factory=dict)
+    experience: list = field(default_factory=list)
+    projects: list = field(default_factory=list)
+    education: list = field(default_factory=list)
+    certifications: list = field(default_factory=list)
+    achievements: list = field(default_factory=list)
+
+    def to_dict(self):
+        """Plain dict in the resume_data schema, e.g. for JSON export and caching"""
+        return {
+            "contact": _slots_dict(self.contact),
+            "professional_summary": self.professional_summary,
+            "technical_skills": {category: list(skills) for category, skills in self.technical_skills.items()},
+            "experience": [_slots_dict(entry) for entry in self.experience],
+            "projects": [_slots_dict(entry) for entry in self.projects],
+            "education": [_slots_dict(entry) for entry in self.education],
+            "certifications": list(self.certifications),
+            "achievements": list(self.achievements)
+        }
+
+
+def _slots_dict(record):
+    """Shallow dict of a slotted dataclass, copying list fields"""
+    return {
+        name: list(value) if isinstance(value, list) else value
+        for name, value in ((name, getattr(record, name)) for name in record.__slots__)
+    }
+
+
+# Items of each list the default layout shows; fit_to_one_page starts from every item and trims
+# back to these only when the page overflows. The model itself keeps everything.
+MAX_RENDERED_HONORS = 2
+MAX_RENDERED_COURSEWORK = 4
+MAX_RENDERED_ROLE_BULLETS = 3
+MAX_RENDERED_PROJECTS = 3
+MAX_RENDERED_PROJECT_BULLETS = 2
+MAX_RENDERED_LIST_ITEMS = 3
+
+# Base sizes from RESUME_CSS in streamlit_app, in pt; the fit engine measures with these and scales them together
+FONT_SIZES = MappingProxyType({"body": 9.5, "name": 18.0, "small": 8.5, "title": 11.0})
+LINE_HEIGHTS = MappingProxyType({"body": 1.25, "contact": 1.3, "subheader": 1.2, "skill": 1.2, "summary": 1.3})
+SPACING = MappingProxyType({
+    "header_margin": 10.0, "header_padding": 6.0, "header_border": 2.0, "name_margin": 3.0, "contact_margin": 2.0,
+    "section_margin": 8.0, "title_margin": 4.0, "title_padding": 1.0, "title_border": 1.0,
+    "entry_margin": 6.0, "entry_header_margin": 1.0, "subheader_margin": 2.0, "bullet_margin": 1.5,
+    "skills_gap": 2.0, "summary_margin": 6.0, "details_indent": 12.0, "bullet_indent": 10.0
+})
+
+
+@dataclass(frozen=True, slots=True)
+class ResumeLayout:
+    """Typography scale and per-list item limits used to render one resume"""
+    font_scale: float = 1.0
+    line_height_scale: float = 1.0
+    spacing_scale: float = 1.0
+    honors: int = MAX_RENDERED_HONORS
+    coursework: int = MAX_RENDERED_COURSEWORK
+    role_bullets: int = MAX_RENDERED_ROLE_BULLETS
+    projects: int = MAX_RENDERED_PROJECTS
+    project_bullets: int = MAX_RENDERED_PROJECT_BULLETS
+    list_items: int = MAX_RENDERED_LIST_ITEMS
+
+    def font(self, role):
+        return FONT_SIZES[role] * self.font_scale
+
+    def line_height(self, role):
+        return LINE_HEIGHTS[role] * self.line_height_scale
+
+    def space(self, name):
+        return SPACING[name] * self.spacing_scale
+
+    def override_css(self):
+        """Extra <style> applying this layout's typography, empty for the default layout"""
+        if (self.font_scale, self.line_height_scale, self.spacing_scale) == (1.0, 1.0, 1.0):
+            return ""
+        font, line, space = self.font, self.line_height, self.space
+        return f"""
+    <style>
+        body {{ font-size: {font('body'):.2f}pt; line-height: {line('body'):.3f}; }}
+        .header {{ margin-bottom: {space('header_margin'):.2f}pt; padding-bottom: {space('header_padding'):.2f}pt; }}
+        .name {{ font-size: {font('name'):.2f}pt; margin-bottom: {space('name_margin'):.2f}pt; }}
+        .contact-info {{ font-size: {font('small'):.2f}pt; line-height: {line('contact'):.3f}; margin-top: {space('contact_margin'):.2f}pt; }}
+        .section {{ margin-bottom: {space('section_margin'):.2f}pt; }}
+        .section-title {{ font-size: {font('title'):.2f}pt; margin-bottom: {space('title_margin'):.2f}pt; }}
+        .entry {{ margin-bottom: {space('entry_margin'):.2f}pt; }}
+        .entry-header {{ font-size: {font('body'):.2f}pt; margin-bottom: {space('entry_header_margin'):.2f}pt; }}
+        .entry-subheader {{ font-size: {font('small'):.2f}pt; line-height: {line('subheader'):.3f}; margin-bottom: {space('subheader_margin'):.2f}pt; }}
+        .bullet {{ margin-bottom: {space('bullet_margin'):.2f}pt; line-height: {line('body'):.3f}; }}
+        .skills-grid {{ gap: {space('skills_gap'):.2f}pt; }}
+        .skill-category {{ margin-bottom: {space('bullet_margin'):.2f}pt; line-height: {line('skill'):.3f}; }}
+        .summary {{ margin-bottom: {space('summary_margin'):.2f}pt; line-height: {line('summary'):.3f}; }}
+    </style>"""
+
+
+DEFAULT_LAYOUT = ResumeLayout()
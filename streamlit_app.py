@@ -3,17 +3,43 @@ import json
 import re
 from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+import queue
+from email.utils import parsedate_to_datetime
 import os
-
-st.set_page_config(
-    page_title="AI Resume Builder",
-    page_icon="📄",
-    layout="wide",
-    initial_sidebar_state="expanded"
+import logging
+import time
+from types import MappingProxyType
+import hashlib
+import sqlite3
+import threading
+import uuid
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import deque, namedtuple, OrderedDict
+from dataclasses import replace
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from pdf_export import PDF_AVAILABLE, PDFExportError, PDFRenderer
+from resume_model import (
+    DEFAULT_LAYOUT,
+    SPACING,
+    ContactInfo,
+    EducationEntry,
+    ExperienceEntry,
+    ProjectEntry,
+    ResumeModel
 )
 
+logger = logging.getLogger(__name__)
+
 # Custom CSS
-st.markdown("""
+APP_CSS = """
 <style>
     .main {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -124,81 +150,311 @@ st.markdown("""
         opacity: 0.9;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+# -----------------------------
+# STATUS REPORTING
+# -----------------------------
+
+NOTIFY_LOG_LEVELS = {
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "code": logging.DEBUG
+}
+
+
+def streamlit_notify(level, message):
+    """Report pipeline progress in the Streamlit UI (level is info/success/warning/error/code)"""
+    getattr(st, level)(message)
+
+
+def log_notify(level, message):
+    """Report pipeline progress through logging, for use outside Streamlit"""
+    logger.log(NOTIFY_LOG_LEVELS.get(level, logging.INFO), message)
+
+
+# -----------------------------
+# LATENCY INSTRUMENTATION
+# -----------------------------
+
+# Histogram bucket bounds in seconds, from in-process steps up to full LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Optional JSONL file that gets one line per timed stage
+LATENCY_LOG_PATH = os.environ.get("LATENCY_LOG_PATH")
+# Optional port serving the histograms as Prometheus text at /metrics, on loopback unless METRICS_HOST says otherwise
+METRICS_PORT = os.environ.get("METRICS_PORT")
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+# Stage timings of the generation running in this context: a list while a job collects them, else None
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+class LatencyRecorder:
+    """Process-wide per-stage latency histograms, exportable as Prometheus text, with an optional JSONL log"""
+
+    def __init__(self, log_path=None, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+        self.log = open(log_path, "a", encoding="utf-8") if log_path else None
+        self.server = None
+
+    def observe(self, stage, seconds, **labels):
+        """Record one timing; it is also appended to the current generation's timings when collected"""
+        key = (stage, tuple(sorted(labels.items())))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            index = bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                series["buckets"][index] += 1
+            series["count"] += 1
+            series["sum"] += seconds
+
+            if self.log is not None:
+                entry = {"ts": round(time.time(), 3), "stage": stage, "seconds": round(seconds, 6), **labels}
+                self.log.write(json.dumps(entry) + "\n")
+                self.log.flush()
+
+        timings = current_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds, labels))
+
+    def snapshot(self):
+        """Return [(stage, labels, count, total_seconds), ...] sorted by stage"""
+        with self.lock:
+            items = sorted(self.series.items(), key=lambda item: item[0])
+            return [(stage, dict(labels), series["count"], series["sum"]) for (stage, labels), series in items]
+
+    def prometheus_text(self):
+        """Render every series in the Prometheus text exposition format"""
+        lines = [
+            "# HELP resume_stage_seconds Time spent in each stage of resume generation",
+            "# TYPE resume_stage_seconds histogram"
+        ]
+        with self.lock:
+            series_items = [
+                (key, dict(series, buckets=list(series["buckets"])))
+                for key, series in sorted(self.series.items(), key=lambda item: item[0])
+            ]
+
+        for (stage, labels), series in series_items:
+            label_text = ",".join([f'stage="{stage}"'] + [f'{name}="{value}"' for name, value in labels])
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                lines.append(f'resume_stage_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'resume_stage_seconds_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+            lines.append(f"resume_stage_seconds_sum{{{label_text}}} {series['sum']:.6f}")
+            lines.append(f"resume_stage_seconds_count{{{label_text}}} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(recorder, port, host=METRICS_HOST):
+    """Serve the recorder's Prometheus text at /metrics from a daemon thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = recorder.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+@st.cache_resource(show_spinner=False)
+def get_latency_recorder():
+    """Process-wide latency recorder, plus the /metrics endpoint when METRICS_PORT is set"""
+    recorder = LatencyRecorder(LATENCY_LOG_PATH)
+    if METRICS_PORT:
+        recorder.server = serve_metrics(recorder, int(METRICS_PORT))
+    return recorder
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Time the enclosed block as `stage`; the yielded labels dict can be amended, e.g. with an outcome"""
+    started = time.perf_counter()
+    try:
+        yield labels
+    except GeneratorExit:
+        labels.setdefault("outcome", "cancelled")
+        raise
+    except BaseException:
+        labels.setdefault("outcome", "error")
+        raise
+    finally:
+        get_latency_recorder().observe(stage, time.perf_counter() - started, **labels)
 
 
 # -----------------------------
 # ENHANCED ATS KEYWORD EXTRACTION
 # -----------------------------
 
+INDUSTRY_KEYWORDS = MappingProxyType({
+    "software_engineering": MappingProxyType({
+        "technical": ("Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git",
+                      "Docker", "AWS", "API", "RESTful", "Agile", "CI/CD", "TypeScript",
+                      "MongoDB", "PostgreSQL", "Redis", "Kubernetes", "Microservices"),
+        "soft_skills": ("problem-solving", "collaboration", "communication", "leadership",
+                        "analytical thinking", "team player", "self-motivated"),
+        "action_verbs": ("developed", "engineered", "implemented", "optimized", "architected",
+                         "designed", "deployed", "maintained", "automated", "integrated")
+    }),
+    "data_science": MappingProxyType({
+        "technical": ("Python", "R", "SQL", "Machine Learning", "Deep Learning", "TensorFlow",
+                      "PyTorch", "Pandas", "NumPy", "Scikit-learn", "Data Visualization",
+                      "Statistical Analysis", "A/B Testing", "Tableau", "Power BI", "Spark"),
+        "soft_skills": ("analytical thinking", "problem-solving", "communication", "storytelling",
+                        "business acumen", "attention to detail", "critical thinking"),
+        "action_verbs": ("analyzed", "modeled", "predicted", "optimized", "visualized",
+                         "implemented", "researched", "evaluated", "trained", "deployed")
+    }),
+    "marketing": MappingProxyType({
+        "technical": ("Google Analytics", "SEO", "SEM", "Content Marketing", "Social Media",
+                      "Email Marketing", "Google Ads", "Facebook Ads", "HubSpot", "Salesforce",
+                      "A/B Testing", "Marketing Automation", "CRM", "Adobe Creative Suite"),
+        "soft_skills": ("creativity", "communication", "analytical thinking", "strategic planning",
+                        "project management", "collaboration", "adaptability"),
+        "action_verbs": ("launched", "executed", "optimized", "managed", "created", "coordinated",
+                         "analyzed", "increased", "drove", "developed")
+    }),
+    "business_analyst": MappingProxyType({
+        "technical": ("SQL", "Excel", "Tableau", "Power BI", "JIRA", "Agile", "Scrum",
+                      "Data Analysis", "Requirements Gathering", "Process Improvement",
+                      "Business Intelligence", "Stakeholder Management"),
+        "soft_skills": ("analytical thinking", "problem-solving", "communication", "collaboration",
+                        "attention to detail", "critical thinking", "adaptability"),
+        "action_verbs": ("analyzed", "identified", "documented", "collaborated", "facilitated",
+                         "improved", "streamlined", "evaluated", "recommended", "implemented")
+    }),
+    "product_management": MappingProxyType({
+        "technical": ("Product Strategy", "Roadmap Planning", "User Research", "A/B Testing",
+                      "Agile", "Scrum", "JIRA", "Analytics", "SQL", "Wireframing", "Prototyping"),
+        "soft_skills": ("leadership", "strategic thinking", "communication", "collaboration",
+                        "decision-making", "stakeholder management", "prioritization"),
+        "action_verbs": ("launched", "led", "drove", "prioritized", "defined", "coordinated",
+                         "analyzed", "optimized", "collaborated", "delivered")
+    })
+})
+
+# Terms that signal each industry. Declaration order breaks score ties.
+INDUSTRY_TRIGGERS = MappingProxyType({
+    "software_engineering": ("software", "developer", "engineer", "programming", "coding",
+                             "full-stack", "full stack", "backend", "frontend", "devops"),
+    "data_science": ("data", "machine learning", "ml", "ai", "analytics", "data scientist",
+                     "deep learning", "nlp", "computer vision"),
+    "marketing": ("marketing", "digital marketing", "seo", "sem", "social media", "content marketing"),
+    "business_analyst": ("business analyst", "ba", "requirements", "business analysis"),
+    "product_management": ("product manager", "pm", "product", "product management", "product owner", "roadmap")
+})
+
+DEFAULT_INDUSTRY = "software_engineering"
+
+
+def _trie_regex(terms):
+    """Build a prefix-factored alternation so the regex engine never re-tests a shared prefix"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node):
+        alternatives = [
+            (r"\s+" if char == " " else re.escape(char)) + emit(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        # Optional tail keeps shorter terms matchable while the greedy engine prefers the longest
+        return "(?:" + body + ")?" if "" in node else body
+
+    return emit(trie)
+
+
+def _build_industry_matcher(triggers):
+    """Compile every trigger term into one word-boundary regex plus a term -> ((industry index, weight), ...) index.
+
+    The regex captures the term without an optional plural "s", so "engineers"
+    and "PMs" count as "engineer" and "pm".
+    """
+    industry_index = {industry: i for i, industry in enumerate(triggers)}
+    term_scores = {}
+    for industry, terms in triggers.items():
+        for term in terms:
+            # Multi-word phrases are stronger evidence than single words
+            term_scores.setdefault(term, []).append((industry_index[industry], float(len(term.split()))))
+
+    pattern = re.compile(r"(?<!\w)(" + _trie_regex(term_scores) + r")s?(?!\w)")
+    index = MappingProxyType({term: tuple(scores) for term, scores in term_scores.items()})
+    return pattern, index
+
+
+@st.cache_resource(show_spinner=False)
+def get_industry_matcher():
+    """Process-wide industry matcher, so reruns of the script don't rebuild the trie regex"""
+    return _build_industry_matcher(INDUSTRY_TRIGGERS)
+
+
+INDUSTRY_NAMES = tuple(INDUSTRY_TRIGGERS)
+INDUSTRY_PATTERN, INDUSTRY_TERM_INDEX = get_industry_matcher()
+
+
 class ATSKeywordExtractor:
     """Extract and suggest ATS-friendly keywords based on role/industry"""
-    
+
+    @staticmethod
+    def score_industries(user_input):
+        """Score every industry in a single pass over the input, in INDUSTRY_NAMES order"""
+        scores = [0.0] * len(INDUSTRY_NAMES)
+
+        # Terms are stored lowercase, so lowercase once instead of matching case-insensitively
+        for term in INDUSTRY_PATTERN.findall(user_input.lower()):
+            if term not in INDUSTRY_TERM_INDEX:
+                term = " ".join(term.split())
+            for industry, weight in INDUSTRY_TERM_INDEX[term]:
+                scores[industry] += weight
+
+        return scores
+
+    @staticmethod
+    def classify_industry(user_input):
+        """Return [(industry, score), ...] for every matching industry, best match first"""
+        scores = ATSKeywordExtractor.score_industries(user_input)
+        # Stable sort, so ties keep INDUSTRY_TRIGGERS order
+        ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        return [(INDUSTRY_NAMES[i], scores[i]) for i in ranked if scores[i] > 0]
+
+    @staticmethod
+    def detect_industry(user_input):
+        """Return the best matching industry, or DEFAULT_INDUSTRY when nothing matches"""
+        scores = ATSKeywordExtractor.score_industries(user_input)
+        # max() returns the first of equal scores, matching classify_industry's tie-break
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return INDUSTRY_NAMES[best] if scores[best] > 0 else DEFAULT_INDUSTRY
+
     @staticmethod
     def get_industry_keywords(user_input):
         """Extract industry-specific ATS keywords"""
-        user_input_lower = user_input.lower()
-        
-        keywords = {
-            "software_engineering": {
-                "technical": ["Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git", 
-                             "Docker", "AWS", "API", "RESTful", "Agile", "CI/CD", "TypeScript",
-                             "MongoDB", "PostgreSQL", "Redis", "Kubernetes", "Microservices"],
-                "soft_skills": ["problem-solving", "collaboration", "communication", "leadership",
-                               "analytical thinking", "team player", "self-motivated"],
-                "action_verbs": ["developed", "engineered", "implemented", "optimized", "architected",
-                                "designed", "deployed", "maintained", "automated", "integrated"]
-            },
-            "data_science": {
-                "technical": ["Python", "R", "SQL", "Machine Learning", "Deep Learning", "TensorFlow",
-                             "PyTorch", "Pandas", "NumPy", "Scikit-learn", "Data Visualization",
-                             "Statistical Analysis", "A/B Testing", "Tableau", "Power BI", "Spark"],
-                "soft_skills": ["analytical thinking", "problem-solving", "communication", "storytelling",
-                               "business acumen", "attention to detail", "critical thinking"],
-                "action_verbs": ["analyzed", "modeled", "predicted", "optimized", "visualized",
-                                "implemented", "researched", "evaluated", "trained", "deployed"]
-            },
-            "marketing": {
-                "technical": ["Google Analytics", "SEO", "SEM", "Content Marketing", "Social Media",
-                             "Email Marketing", "Google Ads", "Facebook Ads", "HubSpot", "Salesforce",
-                             "A/B Testing", "Marketing Automation", "CRM", "Adobe Creative Suite"],
-                "soft_skills": ["creativity", "communication", "analytical thinking", "strategic planning",
-                               "project management", "collaboration", "adaptability"],
-                "action_verbs": ["launched", "executed", "optimized", "managed", "created", "coordinated",
-                                "analyzed", "increased", "drove", "developed"]
-            },
-            "business_analyst": {
-                "technical": ["SQL", "Excel", "Tableau", "Power BI", "JIRA", "Agile", "Scrum",
-                             "Data Analysis", "Requirements Gathering", "Process Improvement",
-                             "Business Intelligence", "Stakeholder Management"],
-                "soft_skills": ["analytical thinking", "problem-solving", "communication", "collaboration",
-                               "attention to detail", "critical thinking", "adaptability"],
-                "action_verbs": ["analyzed", "identified", "documented", "collaborated", "facilitated",
-                                "improved", "streamlined", "evaluated", "recommended", "implemented"]
-            },
-            "product_management": {
-                "technical": ["Product Strategy", "Roadmap Planning", "User Research", "A/B Testing",
-                             "Agile", "Scrum", "JIRA", "Analytics", "SQL", "Wireframing", "Prototyping"],
-                "soft_skills": ["leadership", "strategic thinking", "communication", "collaboration",
-                               "decision-making", "stakeholder management", "prioritization"],
-                "action_verbs": ["launched", "led", "drove", "prioritized", "defined", "coordinated",
-                                "analyzed", "optimized", "collaborated", "delivered"]
-            }
-        }
-        
-        # Detect industry
-        if any(word in user_input_lower for word in ["software", "developer", "engineer", "programming", "coding"]):
-            return keywords["software_engineering"]
-        elif any(word in user_input_lower for word in ["data", "machine learning", "ml", "ai", "analytics"]):
-            return keywords["data_science"]
-        elif any(word in user_input_lower for word in ["marketing", "digital marketing", "seo", "social media"]):
-            return keywords["marketing"]
-        elif any(word in user_input_lower for word in ["business analyst", "ba", "requirements"]):
-            return keywords["business_analyst"]
-        elif any(word in user_input_lower for word in ["product manager", "pm", "product"]):
-            return keywords["product_management"]
-        else:
-            return keywords["software_engineering"]  # Default
+        return INDUSTRY_KEYWORDS[ATSKeywordExtractor.detect_industry(user_input)]
 
 
 # -----------------------------
@@ -206,18 +462,37 @@ class ATSKeywordExtractor:
 # -----------------------------
 
 
+# A chat prompt split into a static, cacheable system prefix and the per-request user message.
+# `sections` names the resume keys the reply must contain (None means all of them).
+ChatPrompt = namedtuple("ChatPrompt", ["system", "user", "sections"], defaults=(None,))
+
+
 class ResumeTemplates:
+    # Bump whenever get_enhanced_prompt changes so cached resumes are regenerated
+    PROMPT_VERSION = "4"
+
+    @staticmethod
+    def user_message(user_input):
+        """The only per-request part of a prompt; it goes last so the instructions before it stay cacheable"""
+        return f'USER INPUT: "{user_input}"\n\nReturn ONLY the JSON object for this candidate.'
+
     @staticmethod
     def get_enhanced_prompt(user_input):
         """Generate ultra-optimized prompt for comprehensive ATS-friendly resumes with ATTRACTIVE summary"""
-        current_year = datetime.now().year
-        keywords = ATSKeywordExtractor.get_industry_keywords(user_input)
-        
-        prompt = f"""You are a SENIOR ATS OPTIMIZATION SPECIALIST and CERTIFIED PROFESSIONAL RESUME WRITER (CPRW) with 15+ years experience. Your resumes achieve 94% interview callback rate and rank in top 1% for ATS compatibility.
+        industry = ATSKeywordExtractor.detect_industry(user_input)
+        return ChatPrompt(ResumeTemplates.get_enhanced_instructions(industry), ResumeTemplates.user_message(user_input))
 
-MISSION: Create COMPREHENSIVE, RECRUITER-READY, ATS-OPTIMIZED resume extracting EVERY detail from user input and transforming it into compelling, keyword-rich content that passes automated screening AND impresses human recruiters.
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_enhanced_instructions(industry):
+        """Full instructions for an industry, byte-identical for every user so provider prompt caches can hit"""
+        keywords = INDUSTRY_KEYWORDS[industry]
+
+        return f"""{SYSTEM_PROMPT}
 
-USER INPUT: "{user_input}"
+You are a SENIOR ATS OPTIMIZATION SPECIALIST and CERTIFIED PROFESSIONAL RESUME WRITER (CPRW) with 15+ years experience. Your resumes achieve 94% interview callback rate and rank in top 1% for ATS compatibility.
+
+MISSION: Create COMPREHENSIVE, RECRUITER-READY, ATS-OPTIMIZED resume extracting EVERY detail from the USER INPUT (given at the end) and transforming it into compelling, keyword-rich content that passes automated screening AND impresses human recruiters.
 
 ═══════════════════════════════════════════════════════════════
 ELITE ONE-PAGE A4 RESUME - EXECUTIVE STANDARD
@@ -250,7 +525,7 @@ ELITE CONTENT ARCHITECTURE:
    • Performance: "reducing costs XX%", "improving speed XX%"
    • MINIMUM metrics: 6-figure revenue OR 100K+ users OR 50%+ improvements
    
-   Sentence 3: "Deep technical mastery in [5-6 cutting-edge technologies]: {keywords['technical'][:6]}, [delivering systematic excellence]"
+   Sentence 3: "Deep technical mastery in [5-6 cutting-edge technologies]: {list(keywords['technical'][:6])}, [delivering systematic excellence]"
    • Stack modern tech (Cloud-native, AI/ML, Microservices, Real-time systems)
    • Show breadth + depth: Full-stack, distributed systems, scalable architecture
    • Business connection: "driving digital transformation", "enabling data-driven decisions"
@@ -662,7 +937,139 @@ TARGET OUTCOME:
 
 Return ONLY valid JSON with NO extra text, comments, or explanations."""
 
-        return prompt
+    # Compact per-section schema, used when only some sections are requested
+    SECTION_SCHEMAS = {
+        "contact": '{"name": "Full Name", "email": "...", "phone": "...", "location": "City, State", "linkedin": "...", "github": "...", "portfolio": "..."}',
+        "professional_summary": '"4 sentences, 110-140 words: senior positioning, 3+ quantified achievements, 10-12 ATS keywords"',
+        "technical_skills": '{"Category": ["skill", ...]} - 4 categories, 20-28 skills in total',
+        "experience": '[{"title": "...", "company": "...", "location": "City, ST", "duration": "Mon YYYY - Present", "achievements": ["3 bullets of 15-22 words: power verb + technologies + metric + business impact"]}] - 2-3 roles',
+        "projects": '[{"title": "...", "technologies": "...", "duration": "Mon YYYY - Mon YYYY", "description": ["2 bullets of 18-22 words"], "github": "...", "demo": "..."}] - 0-2 projects',
+        "education": '[{"degree": "...", "institution": "...", "location": "City, State", "graduation": "Mon YYYY", "gpa": "only if 3.7+", "relevant_coursework": ["3-4 courses"], "honors": ["..."]}]',
+        "certifications": '["Certification Name (Issuing Org, YYYY)", ...] - top 3 industry-recognized',
+        "achievements": '["Achievement with quantified impact and year", ...] - top 2'
+    }
+
+    # Requests issued concurrently by the parallel-sections pipeline
+    SECTION_GROUPS = (
+        ("contact", "professional_summary"),
+        ("technical_skills",),
+        ("experience",),
+        ("projects",),
+        ("education", "certifications", "achievements")
+    )
+
+    @staticmethod
+    def get_section_guidelines(keywords):
+        """Condensed writing rules for each section, mirroring the full prompt"""
+        return {
+            "contact": "Extract name, email, phone, location and profile links from the input; use professional placeholders for anything not given.",
+            "professional_summary": f"Exactly 4 sentences, 110-140 words: elite descriptor + senior role + years, 2-3 big quantified achievements, technical mastery in {', '.join(keywords['technical'][:6])}, then leadership and team impact. Integrate 10-12 ATS keywords including {', '.join(keywords['soft_skills'][:4])}. Executive tone, no pronouns.",
+            "technical_skills": "20-28 skills across 4 categories (Languages & Frameworks, Cloud & Infrastructure, Databases & Data, Tools & Practices), most in-demand first. Extract ALL technologies from the input and add complementary industry standards.",
+            "experience": f"2-3 most recent roles showing seniority and progression, exactly 3 bullets each of 15-22 words. Each bullet starts with a power verb ({', '.join(keywords['action_verbs'][:8])}), names 2-3 technologies, and ends with a metric and business impact.",
+            "projects": "Include 0-2 projects only if the candidate is early career or the projects are exceptional; otherwise return an empty list.",
+            "education": "Degree spelled out in full; GPA only if 3.7+; 3-4 advanced relevant courses; substantial honors only. Skip high school.",
+            "certifications": "Top 3 industry-recognized certifications (AWS, Google Cloud, Azure, CKA, PMP...) with issuing org and year. No MOOC certificates.",
+            "achievements": "Top 2 genuinely impressive achievements (hackathon wins, major open source, publications, awards) with quantified impact and year."
+        }
+
+    @staticmethod
+    def get_section_prompt(user_input, sections):
+        """Generate a short prompt for just the given sections of the resume"""
+        industry = ATSKeywordExtractor.detect_industry(user_input)
+        return ChatPrompt(
+            ResumeTemplates.get_section_instructions(industry, tuple(sections)),
+            ResumeTemplates.user_message(user_input),
+            tuple(sections)
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_section_instructions(industry, sections):
+        """Static instructions for one section group, cached per industry"""
+        guidelines = ResumeTemplates.get_section_guidelines(INDUSTRY_KEYWORDS[industry])
+        rules = "\n".join(f"- {key}: {guidelines[key]}" for key in sections)
+        schema = ",\n".join(f'  "{key}": {ResumeTemplates.SECTION_SCHEMAS[key]}' for key in sections)
+
+        return f"""{SYSTEM_PROMPT}
+
+You are a SENIOR ATS OPTIMIZATION SPECIALIST and CERTIFIED PROFESSIONAL RESUME WRITER (CPRW). Write part of a one-page, ATS-optimized resume: extract every relevant detail from the USER INPUT (given at the end) and turn it into keyword-rich, quantified, recruiter-ready content.
+
+SECTIONS TO WRITE:
+{rules}
+
+Return ONLY a valid JSON object with exactly these keys, no extra text:
+{{
+{schema}
+}}"""
+
+    COMPACT_EXAMPLES = """
+EXAMPLES (match this density and tone):
+- Summary: "Award-winning Senior Software Architect with 6+ years pioneering cloud-native solutions for Fortune 500 clients, specializing in React, Node.js, AWS, and microservices architecture that process 10M+ daily transactions. Proven expertise delivering transformative impact: architected platform generating $8.2M additional annual revenue while reducing infrastructure costs 47%..."
+- Bullet: "Architected microservices payment gateway using Node.js, RabbitMQ, and PostgreSQL, processing 500K+ daily transactions with 99.99% reliability, reducing payment failures by 82% and recovering $1.2M in annual revenue"
+"""
+
+    @staticmethod
+    def get_compact_prompt(user_input, include_examples=False):
+        """Generate a token-lean prompt: each instruction once, schema once, examples optional"""
+        industry = ATSKeywordExtractor.detect_industry(user_input)
+        return ChatPrompt(
+            ResumeTemplates.get_compact_instructions(industry, include_examples),
+            ResumeTemplates.user_message(user_input)
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_compact_instructions(industry, include_examples=False):
+        """Static compact instructions, cached per industry"""
+        guidelines = ResumeTemplates.get_section_guidelines(INDUSTRY_KEYWORDS[industry])
+        rules = "\n".join(f"- {key}: {guidelines[key]}" for key in RESUME_SECTIONS)
+        schema = ",\n".join(f'  "{key}": {ResumeTemplates.SECTION_SCHEMAS[key]}' for key in RESUME_SECTIONS)
+        examples = ResumeTemplates.COMPACT_EXAMPLES if include_examples else ""
+
+        return f"""{SYSTEM_PROMPT}
+
+You are a SENIOR ATS OPTIMIZATION SPECIALIST and CERTIFIED PROFESSIONAL RESUME WRITER (CPRW). Create a comprehensive one-page A4 resume: extract EVERY detail from the USER INPUT (given at the end) and turn it into keyword-rich, quantified content that passes ATS screening and impresses recruiters.
+
+SECTION RULES:
+{rules}
+
+ATS RULES:
+- Repeat the top 5 keywords 3-4x across sections; write acronyms both ways, e.g. "Continuous Integration/Continuous Deployment (CI/CD)"
+- Every bullet: power verb first, 2-3 technologies in context, realistic quantified metric, business impact
+- Dates as "Mon YYYY - Mon YYYY"; no personal pronouns; past tense for previous roles, present for the current one
+{examples}
+Return ONLY a valid JSON object with these keys, no extra text:
+{{
+{schema}
+}}"""
+
+    @staticmethod
+    def get_prompt_variants(user_input):
+        """Full and compact prompts for one input; each provider sends the style it is configured for"""
+        return {
+            "full": ResumeTemplates.get_enhanced_prompt(user_input),
+            "compact": ResumeTemplates.get_compact_prompt(user_input)
+        }
+
+    @staticmethod
+    def get_continuation_prompt(user_input, resume_data, missing_sections):
+        """Ask for only the sections a truncated response did not deliver"""
+        context = {key: resume_data[key] for key in ("contact", "professional_summary") if resume_data.get(key)}
+        schema = ",\n".join(f'  "{key}": {ResumeTemplates.SECTION_SCHEMAS[key]}' for key in missing_sections)
+
+        instructions = f"""{SYSTEM_PROMPT}
+
+Continue an ATS-optimized resume that was cut off. Generate ONLY the missing sections listed below, consistent with the candidate and the content already written.
+
+Return ONLY a valid JSON object with exactly these keys:
+{{
+{schema}
+}}"""
+
+        return ChatPrompt(instructions, f"""{ResumeTemplates.user_message(user_input)}
+
+ALREADY WRITTEN:
+{json.dumps(context, ensure_ascii=False)}""", tuple(missing_sections))
 
     @staticmethod
     def get_fallback_template(user_name):
@@ -732,485 +1139,3180 @@ Return ONLY valid JSON with NO extra text, comments, or explanations."""
         }
 
 
-# -----------------------------
-# API INTEGRATION
-# -----------------------------
+RESUME_SECTIONS = tuple(ResumeTemplates.SECTION_SCHEMAS)
 
-def call_llm_api(prompt, api_key=None, api_provider="groq"):
-    """Call various LLM APIs with enhanced error handling"""
-    
-    DEFAULT_SAMBANOVA_KEY = "3dc3c491-f4db-4905-bc1d-ddf941a42bb3"
-
-    providers = {
-        "sambanova": {
-            "url": "https://api.sambanova.ai/v1/chat/completions",
-            "env_var": "SAMBANOVA_API_KEY",
-            "model": "gpt-oss-120b",
-            "max_tokens": 4096
-        },
-        "together": {
-            "url": "https://api.together.xyz/v1/chat/completions",
-            "env_var": "TOGETHER_API_KEY",
-            "model": "meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo",
-            "max_tokens": 4096
-        },
-        "openai": {
-            "url": "https://api.openai.com/v1/chat/completions",
-            "env_var": "OPENAI_API_KEY",
-            "model": "gpt-3.5-turbo",
-            "max_tokens": 4096
-        }
-    }
 
-    providers_to_try = [api_provider] if api_provider in providers else []
-    providers_to_try.extend([p for p in ["sambanova", "together", "openai"] if p not in providers_to_try])
+def _object_schema(string_fields=(), list_fields=()):
+    """JSON Schema for an object of string fields and string-list fields"""
+    properties = {name: {"type": "string"} for name in string_fields}
+    properties.update({name: {"type": "array", "items": {"type": "string"}} for name in list_fields})
+    return {"type": "object", "properties": properties}
 
-    last_error = None
 
-    for provider_name in providers_to_try:
-        provider = providers[provider_name]
+# Machine-readable form of the JSON structure described in get_enhanced_prompt
+SECTION_JSON_SCHEMAS = MappingProxyType({
+    "contact": _object_schema(("name", "email", "phone", "location", "linkedin", "github", "portfolio")),
+    "professional_summary": {"type": "string"},
+    "technical_skills": {"type": "object", "additionalProperties": {"type": "array", "items": {"type": "string"}}},
+    "experience": {"type": "array", "items": _object_schema(("title", "company", "location", "duration"), ("achievements",))},
+    "projects": {"type": "array", "items": _object_schema(("title", "technologies", "duration", "github", "demo"), ("description",))},
+    "education": {"type": "array", "items": _object_schema(
+        ("degree", "institution", "location", "graduation", "gpa"), ("relevant_coursework", "honors")
+    )},
+    "certifications": {"type": "array", "items": {"type": "string"}},
+    "achievements": {"type": "array", "items": {"type": "string"}}
+})
 
-        if api_key is None:
-            api_key = os.environ.get(provider["env_var"])
-            if api_key is None and provider_name == "sambanova":
-                api_key = DEFAULT_SAMBANOVA_KEY
 
-        if not api_key:
-            st.warning(f"⚠️  No API key found for {provider_name}")
-            continue
+@lru_cache(maxsize=None)
+def resume_json_schema(sections=None):
+    """JSON Schema for a resume reply containing the given sections (all of them by default)"""
+    sections = sections or RESUME_SECTIONS
+    return {
+        "type": "object",
+        "properties": {key: SECTION_JSON_SCHEMAS[key] for key in sections},
+        "required": list(sections)
+    }
 
-        try:
-            st.info(f"🔄 Generating with {provider_name.upper()}...")
 
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
+# -----------------------------
+# API INTEGRATION
+# -----------------------------
 
-            payload = {
-                "model": provider["model"],
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are an expert ATS resume writer and career coach. You create compelling, keyword-optimized resumes that pass ATS systems and impress recruiters. Always respond with valid JSON only. Focus on achievements, metrics, and impact."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": provider["max_tokens"],
-                "temperature": 0.8
-            }
+DEFAULT_SAMBANOVA_KEY = "3dc3c491-f4db-4905-bc1d-ddf941a42bb3"
+
+# max_concurrency and requests_per_minute are conservative client-side defaults, not the
+# providers' published quotas; set e.g. SAMBANOVA_REQUESTS_PER_MINUTE to match your plan
+LLM_PROVIDERS = {
+    "sambanova": {
+        "url": "https://api.sambanova.ai/v1/chat/completions",
+        "env_var": "SAMBANOVA_API_KEY",
+        "model": "gpt-oss-120b",
+        "max_tokens": 4096,
+        "max_concurrency": 8,
+        "requests_per_minute": 60,
+        "prompt_style": "full",
+        "response_format": "json_object"
+    },
+    "together": {
+        "url": "https://api.together.xyz/v1/chat/completions",
+        "env_var": "TOGETHER_API_KEY",
+        "model": "meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo",
+        "max_tokens": 4096,
+        "max_concurrency": 8,
+        "requests_per_minute": 60,
+        "prompt_style": "full",
+        "response_format": "json_object"
+    },
+    "openai": {
+        "url": "https://api.openai.com/v1/chat/completions",
+        "env_var": "OPENAI_API_KEY",
+        "model": "gpt-3.5-turbo",
+        "max_tokens": 4096,
+        "max_concurrency": 16,
+        "requests_per_minute": 500,
+        # Paid per token, so it gets the lean prompt by default
+        "prompt_style": "compact",
+        "response_format": "json_object"
+    }
+}
 
-            response = requests.post(
-                provider["url"],
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
+PROVIDER_ORDER = ["sambanova", "together", "openai"]
 
-            if response.status_code != 200:
-                error_detail = response.text[:200]
-                raise Exception(f"HTTP {response.status_code}: {error_detail}")
+SYSTEM_PROMPT = "You are an expert ATS resume writer and career coach. You create compelling, keyword-optimized resumes that pass ATS systems and impress recruiters. Always respond with valid JSON only. Focus on achievements, metrics, and impact."
 
-            response.raise_for_status()
-            result = response.json()
+# Keep-alive connections kept open per provider (override with LLM_POOL_SIZE)
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "10"))
+LLM_TIMEOUT = 120
 
-            if "choices" in result and len(result["choices"]) > 0:
-                content = result["choices"][0]["message"]["content"]
-                st.success(f"✅ Resume generated with {provider_name.upper()}!")
-                return content
-            else:
-                raise Exception(f"Unexpected response format from {provider_name}")
+# Seconds to wait on the primary before hedging with a backup provider.
+# Unset means "use the primary's recent p95 latency", falling back to the default.
+LLM_HEDGE_DELAY = os.environ.get("LLM_HEDGE_DELAY")
+DEFAULT_HEDGE_DELAY = 10.0
 
-        except Exception as e:
-            last_error = str(e)
-            st.warning(f"⚠️  {provider_name} failed: {str(e)[:100]}")
-            api_key = None
-            continue
+# Longest Retry-After we are willing to wait out instead of failing over / giving up
+MAX_RETRY_AFTER = 30.0
 
-    raise Exception(f"All API providers failed. Last error: {last_error}")
 
+def provider_prompt_style(provider_name):
+    """Prompt style ("full" or "compact") for a provider; override with e.g. OPENAI_PROMPT_STYLE"""
+    return os.environ.get(f"{provider_name.upper()}_PROMPT_STYLE", LLM_PROVIDERS[provider_name].get("prompt_style", "full"))
 
-# -----------------------------
-# HTML GENERATION (A4 OPTIMIZED)
-# -----------------------------
 
-def generate_html_resume(resume_data):
-    """Generate a professional single-page A4 HTML resume"""
+# Structured output modes: "json_schema" (schema-constrained), "json_object" (JSON mode) or "none"
+RESPONSE_FORMATS = ("json_schema", "json_object", "none")
 
-    contact = resume_data.get('contact', {})
 
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{contact.get('name', 'Professional Resume')}</title>
-    <style>
-        @page {{
-            size: A4;
-            margin: 0;
-        }}
+def provider_response_format(provider_name):
+    """Structured output mode for a provider; override with e.g. OPENAI_RESPONSE_FORMAT=json_schema"""
+    response_format = os.environ.get(
+        f"{provider_name.upper()}_RESPONSE_FORMAT",
+        LLM_PROVIDERS[provider_name].get("response_format", "none")
+    )
+    return response_format if response_format in RESPONSE_FORMATS else "none"
 
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
 
-        body {{
-            font-family: 'Calibri', 'Arial', sans-serif;
-            font-size: 9.5pt;
-            line-height: 1.25;
-            color: #333;
-            background: white;
-            width: 210mm;
-            min-height: 297mm;
-            max-height: 297mm;
-            margin: 0 auto;
-            padding: 12mm 15mm;
-            overflow: hidden;
-        }}
+def provider_limit(provider_name, setting, default):
+    """Numeric per-provider limit ("max_concurrency", "requests_per_minute"); override with e.g. TOGETHER_MAX_CONCURRENCY"""
+    value = os.environ.get(f"{provider_name.upper()}_{setting.upper()}")
+    if value is None:
+        return LLM_PROVIDERS[provider_name].get(setting, default)
+    return max(1, int(value))
 
-        .header {{
-            text-align: center;
-            margin-bottom: 10pt;
-            padding-bottom: 6pt;
-            border-bottom: 2pt solid #1F4E79;
-        }}
 
-        .name {{
-            font-size: 18pt;
-            font-weight: bold;
-            color: #1F4E79;
-            margin-bottom: 3pt;
-            letter-spacing: 0.5pt;
-        }}
+def estimate_tokens(text):
+    """Rough token count for when a provider reports no usage: ~4 ASCII characters per token, one per other character"""
+    ascii_count = len(text.encode("ascii", "ignore"))
+    return (ascii_count + 3) // 4 + len(text) - ascii_count
 
-        .contact-info {{
-            font-size: 8.5pt;
-            color: #595959;
-            margin-top: 2pt;
-            line-height: 1.3;
-        }}
 
-        .contact-info a {{
-            color: #595959;
-            text-decoration: none;
-        }}
+class TokenMeter:
+    """Process-wide running totals of prompt and completion tokens per provider"""
 
-        .section {{
-            margin-bottom: 8pt;
-            page-break-inside: avoid;
-        }}
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
 
-        .section-title {{
-            font-size: 11pt;
-            font-weight: bold;
-            color: #1F4E79;
-            text-transform: uppercase;
-            margin-bottom: 4pt;
-            padding-bottom: 1pt;
-            border-bottom: 1pt solid #1F4E79;
-            letter-spacing: 0.3pt;
-        }}
+    def record(self, usage):
+        with self.lock:
+            totals = self.totals.setdefault(usage["provider"], {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["requests"] += 1
+            totals["prompt_tokens"] += usage["prompt_tokens"]
+            totals["completion_tokens"] += usage["completion_tokens"]
 
-        .entry {{
-            margin-bottom: 6pt;
-            page-break-inside: avoid;
-        }}
+    def snapshot(self):
+        with self.lock:
+            return {name: dict(totals) for name, totals in self.totals.items()}
 
-        .entry-header {{
-            font-weight: bold;
-            margin-bottom: 1pt;
-            font-size: 9.5pt;
-        }}
 
-        .entry-subheader {{
-            font-size: 8.5pt;
-            color: #595959;
-            margin-bottom: 2pt;
-            line-height: 1.2;
-        }}
+@st.cache_resource(show_spinner=False)
+def get_token_meter():
+    """One token meter shared by every session in this process"""
+    return TokenMeter()
 
-        .entry-details {{
-            margin-left: 12pt;
-        }}
 
-        .bullet {{
-            margin-bottom: 1.5pt;
-            padding-left: 10pt;
-            text-indent: -10pt;
-            line-height: 1.25;
-        }}
+def report_token_usage(usage, notify):
+    """Record one call's token usage and report it to the user"""
+    if not usage:
+        return
+    get_token_meter().record(usage)
+    approx = "~" if usage.get("estimated") else ""
+    notify("info", f"🔢 {usage['provider'].upper()} ({usage['prompt_style']} prompt): "
+                   f"{approx}{usage['prompt_tokens']} prompt + {approx}{usage['completion_tokens']} completion tokens")
 
-        .skills-grid {{
-            display: grid;
-            grid-template-columns: 1fr;
-            gap: 2pt;
-        }}
 
-        .skill-category {{
-            margin-bottom: 1.5pt;
-            line-height: 1.2;
-        }}
+class LLMProviderError(Exception):
+    """A provider call failed; carries the HTTP status and any Retry-After delay in seconds"""
 
-        .skill-label {{
-            font-weight: bold;
-            display: inline;
-        }}
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
-        .summary {{
-            text-align: justify;
-            margin-bottom: 6pt;
-            line-height: 1.3;
-        }}
 
-        @media print {{
-            body {{
-                margin: 0;
-                padding: 12mm 15mm;
-                width: 210mm;
-                height: 297mm;
-            }}
+def parse_retry_after(value):
+    """Convert a Retry-After header (delta-seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
 
-            .section {{
-                page-break-inside: avoid;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <div class="name">{contact.get('name', 'Your Name')}</div>
-        <div class="contact-info">
-            {contact.get('email', '')} | {contact.get('phone', '')} | {contact.get('location', '')}
-        </div>
-        <div class="contact-info">"""
-
-    links = []
-    if contact.get('linkedin'):
-        links.append(f"{contact['linkedin']}")
-    if contact.get('github'):
-        links.append(f"{contact['github']}")
-    if contact.get('portfolio'):
-        links.append(f"{contact['portfolio']}")
-
-    html_content += " | ".join(links)
-    html_content += """
-        </div>
-    </div>
-"""
 
-    # Professional Summary
-    if resume_data.get('professional_summary'):
-        html_content += f"""
-    <div class="section">
-        <div class="section-title">Professional Summary</div>
-        <div class="summary">{resume_data['professional_summary']}</div>
-    </div>
-"""
+def _earliest_retry_after(current, error):
+    """Keep the shortest Retry-After seen across failed providers"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        return current
+    return retry_after if current is None else min(current, retry_after)
 
-    # Education
-    if resume_data.get('education'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Education</div>
-"""
-        for edu in resume_data['education']:
-            html_content += f"""
-        <div class="entry">
-            <div class="entry-header">{edu.get('degree', '')}</div>
-            <div class="entry-subheader">
-                {edu.get('institution', '')} | {edu.get('location', '')} | {edu.get('graduation', '')}"""
 
-            if edu.get('gpa'):
-                html_content += f" | GPA: {edu['gpa']}"
+# End-to-end time budget for one generation, shared by its retries, failover and hedging
+GENERATION_DEADLINE = float(os.environ.get("GENERATION_DEADLINE", "45"))
+LLM_CONNECT_TIMEOUT = 10
+# Least time left that is still worth starting another provider attempt with
+MIN_ATTEMPT_SECONDS = 1.0
+# A provider attempt may take this multiple of the provider's typical answer time, even when
+# that is more than its even share of the budget
+ATTEMPT_HEADROOM = 1.5
+# Time held back for the providers after one whose typical answer time is not known yet
+ATTEMPT_RESERVE_SECONDS = 5.0
 
-            html_content += "</div>"
+# time.monotonic() by which the generation running in this context must finish, or None
+current_deadline = contextvars.ContextVar("current_deadline", default=None)
+# time.monotonic() by which the current provider attempt must finish, or None
+current_attempt_deadline = contextvars.ContextVar("current_attempt_deadline", default=None)
 
-            if edu.get('honors'):
-                html_content += f"<div class='entry-subheader'>Honors: {', '.join(edu['honors'][:2])}</div>"
 
-            if edu.get('relevant_coursework'):
-                html_content += f"<div class='entry-subheader'>Coursework: {', '.join(edu['relevant_coursework'][:4])}</div>"
+class DeadlineExceededError(LLMProviderError):
+    """The generation's time budget ran out"""
 
-            html_content += "</div>"
 
-        html_content += "    </div>\n"
+class AttemptTimeoutError(LLMProviderError):
+    """A provider attempt ran out of its share of the time budget; the next provider gets the rest"""
 
-    # Technical Skills
-    if resume_data.get('technical_skills'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Technical Skills</div>
-        <div class="skills-grid">
-"""
-        for category, skills in resume_data['technical_skills'].items():
-            if skills:
-                html_content += f"""
-            <div class="skill-category">
-                <span class="skill-label">{category}:</span> {', '.join(skills)}
-            </div>
-"""
-        html_content += """        </div>
-    </div>
-"""
 
-    # Experience
-    if resume_data.get('experience'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Professional Experience</div>
-"""
-        for exp in resume_data['experience']:
-            html_content += f"""
-        <div class="entry">
-            <div class="entry-header">{exp.get('title', '')} | {exp.get('company', '')}</div>
-            <div class="entry-subheader">{exp.get('location', '')} | {exp.get('duration', '')}</div>
-            <div class="entry-details">
-"""
-            for achievement in exp.get('achievements', [])[:3]:
-                html_content += f"""                <div class="bullet">• {achievement}</div>\n"""
+@contextmanager
+def deadline(seconds):
+    """Give everything inside at most `seconds`; an enclosing deadline that ends sooner still applies"""
+    deadline_at = time.monotonic() + seconds
+    outer = current_deadline.get()
+    token = current_deadline.set(deadline_at if outer is None else min(deadline_at, outer))
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
 
-            html_content += """            </div>
-        </div>
-"""
-        html_content += "    </div>\n"
 
-    # Projects
-    if resume_data.get('projects'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Projects</div>
-"""
-        for project in resume_data['projects'][:3]:
-            html_content += f"""
-        <div class="entry">
-            <div class="entry-header">{project.get('title', '')}</div>
-            <div class="entry-subheader">{project.get('technologies', '')}"""
+def time_remaining():
+    """Seconds left before the current deadline, or None when there is none"""
+    deadline_at = current_deadline.get()
+    return None if deadline_at is None else deadline_at - time.monotonic()
 
-            if project.get('duration'):
-                html_content += f" | {project['duration']}"
 
-            project_links = []
-            if project.get('github'):
-                project_links.append(f"GitHub: {project['github']}")
-            if project.get('demo'):
-                project_links.append(f"Demo: {project['demo']}")
-            if project_links:
-                html_content += f" | {' | '.join(project_links)}"
+@contextmanager
+def attempt_deadline(seconds):
+    """Limit one provider attempt to `seconds`; running out of it fails the attempt, not the generation"""
+    if seconds is None:
+        yield
+        return
+    token = current_attempt_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        current_attempt_deadline.reset(token)
+
+
+def attempt_time_remaining():
+    """Seconds left for the current provider attempt: the sooner of its own limit and the deadline"""
+    remaining = time_remaining()
+    attempt_at = current_attempt_deadline.get()
+    if attempt_at is None:
+        return remaining
+    attempt_remaining = attempt_at - time.monotonic()
+    return attempt_remaining if remaining is None else min(remaining, attempt_remaining)
+
+
+def check_deadline(needed=0.0):
+    """Return the seconds left, raising DeadlineExceededError when no more than `needed` remain"""
+    remaining = time_remaining()
+    if remaining is not None and remaining <= needed:
+        raise DeadlineExceededError(f"Time budget of {GENERATION_DEADLINE:.0f}s exhausted ({max(0.0, remaining):.1f}s left)")
+    return remaining
+
+
+def check_attempt_time(error=None):
+    """After a failed request: raise DeadlineExceededError when the budget is spent, AttemptTimeoutError when the attempt's share is"""
+    check_deadline(MIN_ATTEMPT_SECONDS)
+    remaining = attempt_time_remaining()
+    # Timeouts are sized to end with the attempt, so one that fired leaves (next to) nothing
+    if remaining is not None and remaining <= 0.1:
+        raise AttemptTimeoutError("Attempt used up its share of the time budget") from error
+
+
+def request_timeout(limit=LLM_TIMEOUT):
+    """(connect, read) timeouts for the next HTTP call, shrunk to what is left of the attempt and deadline"""
+    check_deadline()
+    remaining = attempt_time_remaining()
+    if remaining is not None:
+        limit = max(0.001, min(limit, remaining))
+    return min(LLM_CONNECT_TIMEOUT, limit), limit
+
+
+# Weight of the newest sample in the router's moving averages
+ROUTER_EWMA_ALPHA = float(os.environ.get("ROUTER_EWMA_ALPHA", "0.3"))
+# Consecutive failures that open a provider's circuit, and how long until it is probed again
+ROUTER_FAILURE_THRESHOLD = int(os.environ.get("ROUTER_FAILURE_THRESHOLD", "3"))
+ROUTER_COOLDOWN = float(os.environ.get("ROUTER_COOLDOWN", "30"))
+# Assumed completion time of a provider that has not answered yet
+ROUTER_DEFAULT_SECONDS = 20.0
+# Timeout of the tiny request that checks whether an open circuit's provider has recovered
+PROBE_TIMEOUT = 10
+
+
+class ProvidersUnavailableError(LLMProviderError):
+    """Every provider's circuit is open; raised straight away instead of waiting on timeouts"""
+
+
+class ProviderStats:
+    """Moving averages and circuit state for one provider/model"""
+
+    __slots__ = ("ttfb", "tokens_per_second", "completion_tokens", "error_rate", "consecutive_failures",
+                 "circuit_open", "probe_at")
+
+    def __init__(self):
+        self.ttfb = None
+        self.tokens_per_second = None
+        self.completion_tokens = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.circuit_open = False
+        self.probe_at = 0.0
+
+    def answer_seconds(self):
+        """Typical time to a complete answer: first byte plus generation time; None before the first success"""
+        if self.ttfb is None:
+            return None
+        seconds = self.ttfb
+        if self.tokens_per_second:
+            seconds += self.completion_tokens / self.tokens_per_second
+        return seconds
+
+    def expected_seconds(self):
+        """Expected time to a usable answer: the typical answer time inflated by the error rate"""
+        seconds = self.answer_seconds()
+        if seconds is None:
+            seconds = ROUTER_DEFAULT_SECONDS
+        return seconds / max(0.1, 1.0 - self.error_rate)
+
+
+def _ewma(current, sample, alpha=ROUTER_EWMA_ALPHA):
+    return sample if current is None else current + alpha * (sample - current)
+
+
+class ProviderRouter:
+    """Orders providers by expected completion time and keeps failing ones out of rotation.
+
+    Every attempt reports back: successes update the latency, throughput and
+    error-rate averages, and ROUTER_FAILURE_THRESHOLD failures in a row open a
+    provider's circuit. Requests never go to an open circuit; a background probe
+    retries it every ROUTER_COOLDOWN seconds and closes it once it answers. With
+    every circuit open, callers get ProvidersUnavailableError immediately.
+    """
+
+    def __init__(self, failure_threshold=ROUTER_FAILURE_THRESHOLD, cooldown=ROUTER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.prober = None
+
+    def _stats(self, name, model):
+        stats = self.stats.get((name, model))
+        if stats is None:
+            stats = self.stats[(name, model)] = ProviderStats()
+        return stats
+
+    def record_success(self, name, model, seconds, ttfb, completion_tokens):
+        with self.lock:
+            stats = self._stats(name, model)
+            stats.ttfb = _ewma(stats.ttfb, ttfb)
+            stats.completion_tokens = _ewma(stats.completion_tokens, completion_tokens)
+            generating = seconds - ttfb
+            if generating > 0 and completion_tokens:
+                stats.tokens_per_second = _ewma(stats.tokens_per_second, completion_tokens / generating)
+            stats.error_rate = _ewma(stats.error_rate, 0.0)
+            stats.consecutive_failures = 0
+            stats.circuit_open = False
+
+    def record_failure(self, name, model):
+        with self.lock:
+            stats = self._stats(name, model)
+            stats.error_rate = _ewma(stats.error_rate, 1.0)
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold:
+                stats.circuit_open = True
+                stats.probe_at = time.monotonic() + self.cooldown
+
+    def close_circuit(self, name, model):
+        """A probe got through: put the provider back in rotation, keeping its averages"""
+        with self.lock:
+            stats = self._stats(name, model)
+            stats.consecutive_failures = 0
+            stats.circuit_open = False
+
+    def order(self, clients, preferred=None):
+        """Return (names to try, names skipped with an open circuit).
+
+        A caller's explicit choice goes first while healthy; the rest are sorted by
+        expected completion time, with PROVIDER_ORDER breaking ties.
+        """
+        with self.lock:
+            ranked = []
+            for name, client in clients.items():
+                stats = self._stats(name, client.model)
+                rank = PROVIDER_ORDER.index(name) if name in PROVIDER_ORDER else len(PROVIDER_ORDER)
+                ranked.append((name != preferred, stats.expected_seconds(), rank, name, stats.circuit_open))
+
+        ranked.sort()
+        names = [name for _, _, _, name, circuit_open in ranked if not circuit_open]
+        skipped = [name for _, _, _, name, circuit_open in ranked if circuit_open]
+        return names, skipped
+
+    def answer_seconds(self, name, model):
+        """Typical answer time of one provider/model, or None while unknown"""
+        with self.lock:
+            stats = self.stats.get((name, model))
+            return None if stats is None else stats.answer_seconds()
+
+    def unavailable_for(self, clients):
+        """Seconds until the next probe when every provider's circuit is open, else None"""
+        # Providers without a key are never tried, so they can't keep the others "available"
+        configured = [(name, client.model) for name, client in clients.items() if client.resolve_api_key()]
+        with self.lock:
+            stats = [self._stats(name, model) for name, model in configured]
+            if not stats or not all(entry.circuit_open for entry in stats):
+                return None
+            return max(0.0, min(entry.probe_at for entry in stats) - time.monotonic())
+
+    def start_probing(self, get_clients):
+        """Probe open circuits from a daemon thread; get_clients returns the sync clients by name"""
+        if self.prober is None:
+            self.prober = threading.Thread(
+                target=self._probe_loop, args=(get_clients,), name="provider-probe", daemon=True
+            )
+            self.prober.start()
+
+    def _probe_loop(self, get_clients):
+        while not self.stopped.wait(1.0):
+            now = time.monotonic()
+            with self.lock:
+                due = [key for key, stats in self.stats.items() if stats.circuit_open and stats.probe_at <= now]
+                for key in due:
+                    # Push the next probe out first so a slow probe is never started twice
+                    self.stats[key].probe_at = now + self.cooldown
+
+            clients = get_clients() if due else {}
+            for name, model in due:
+                client = clients.get(name)
+                if client is None or client.model != model:
+                    continue
+                try:
+                    with timed("provider_probe", provider=name) as labels:
+                        client.probe()
+                        labels["outcome"] = "ok"
+                except Exception as e:
+                    logger.info("Provider %s is still failing: %s", name, str(e)[:100])
+                    self.record_failure(name, model)
+                else:
+                    logger.info("Provider %s recovered, closing its circuit", name)
+                    self.close_circuit(name, model)
+
+    def snapshot(self):
+        """Return {(provider, model): stats dict} for display"""
+        now = time.monotonic()
+        with self.lock:
+            return {
+                key: {
+                    "expected_seconds": stats.expected_seconds(),
+                    "ttfb": stats.ttfb,
+                    "tokens_per_second": stats.tokens_per_second,
+                    "error_rate": stats.error_rate,
+                    "circuit_open": stats.circuit_open,
+                    "probe_in": max(0.0, stats.probe_at - now)
+                }
+                for key, stats in sorted(self.stats.items())
+            }
 
-            html_content += "</div>\n            <div class='entry-details'>\n"
+    def close(self):
+        self.stopped.set()
 
-            for desc in project.get('description', [])[:2]:
-                html_content += f"""                <div class="bullet">• {desc}</div>\n"""
 
-            html_content += """            </div>
-        </div>
-"""
-        html_content += "    </div>\n"
+@st.cache_resource(show_spinner=False)
+def get_provider_router():
+    """Process-wide provider router shared by every session, and by the sync and async clients"""
+    router = ProviderRouter()
+    router.start_probing(get_provider_clients)
+    return router
 
-    # Certifications
-    if resume_data.get('certifications'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Certifications</div>
-        <div class="entry-details">
-"""
-        for cert in resume_data['certifications'][:3]:
-            html_content += f"""            <div class="bullet">• {cert}</div>\n"""
 
-        html_content += """        </div>
-    </div>
-"""
+class BaseProviderClient:
+    """Provider settings, key resolution, payload building and latency tracking shared by sync and async clients"""
 
-    # Achievements
-    if resume_data.get('achievements'):
-        html_content += """
-    <div class="section">
-        <div class="section-title">Achievements & Awards</div>
-        <div class="entry-details">
-"""
-        for achievement in resume_data['achievements'][:3]:
-            html_content += f"""            <div class="bullet">• {achievement}</div>\n"""
+    def __init__(self, name, config):
+        self.name = name
+        # e.g. SAMBANOVA_API_URL points a provider at a local stub server
+        self.url = os.environ.get(f"{name.upper()}_API_URL", config["url"])
+        self.env_var = config["env_var"]
+        self.model = config["model"]
+        self.max_tokens = config["max_tokens"]
+        self.prompt_style = provider_prompt_style(name)
+        self.response_format = provider_response_format(name)
+        self.latencies = deque(maxlen=50)
 
-        html_content += """        </div>
+    def resolve_api_key(self, api_key=None):
+        """Return the explicit key, the provider's env var, or the built-in default"""
+        if api_key is None:
+            api_key = os.environ.get(self.env_var)
+            if api_key is None and self.name == "sambanova":
+                api_key = DEFAULT_SAMBANOVA_KEY
+        return api_key
+
+    def select_prompt(self, prompt):
+        """Pick this provider's variant when given a dict of prompt styles, e.g. from get_prompt_variants"""
+        if isinstance(prompt, dict):
+            return prompt.get(self.prompt_style) or prompt["full"]
+        return prompt
+
+    def build_payload(self, prompt, stream=False):
+        """Build the chat completion payload; a ChatPrompt's static part goes in the system message"""
+        prompt = self.select_prompt(prompt)
+        if isinstance(prompt, ChatPrompt):
+            system, user, sections = prompt
+        else:
+            system, user, sections = SYSTEM_PROMPT, prompt, None
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user}
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": 0.8
+        }
+        if self.response_format == "json_schema":
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "resume", "schema": resume_json_schema(sections)}
+            }
+        elif self.response_format == "json_object":
+            payload["response_format"] = {"type": "json_object"}
+        if stream:
+            payload["stream"] = True
+            # Ask for a final usage chunk so streamed calls report real token counts too
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def fill_usage(self, usage, reported, prompt, completion):
+        """Store provider-reported token counts in `usage`, estimating any the provider left out"""
+        if usage is None:
+            return
+        reported = reported or {}
+        usage["provider"] = self.name
+        usage["prompt_style"] = self.prompt_style if isinstance(prompt, dict) else "custom"
+        usage["response_format"] = self.response_format
+        selected = self.select_prompt(prompt)
+        prompt_text = selected.system + selected.user if isinstance(selected, ChatPrompt) else SYSTEM_PROMPT + selected
+        for key, text in (("prompt_tokens", prompt_text), ("completion_tokens", completion)):
+            if reported.get(key) is not None:
+                usage[key] = reported[key]
+            else:
+                usage[key] = estimate_tokens(text)
+                usage["estimated"] = True
+
+    def parse_completion(self, result):
+        """Pull the message text out of a chat completion response body"""
+        if "choices" in result and len(result["choices"]) > 0:
+            return result["choices"][0]["message"]["content"]
+        raise LLMProviderError(f"Unexpected response format from {self.name}")
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    @contextmanager
+    def attempt(self, call):
+        """Time one request as llm_attempt and report a failure to the router; cancellation is not a failure"""
+        with timed("llm_attempt", provider=self.name, call=call) as labels:
+            try:
+                yield labels
+            except DeadlineExceededError:
+                # Cut short by our own budget, which says nothing about the provider's health
+                raise
+            except AttemptTimeoutError:
+                # Its share of the budget is only a verdict on the provider once we know how long it usually takes
+                if get_provider_router().answer_seconds(self.name, self.model) is not None:
+                    get_provider_router().record_failure(self.name, self.model)
+                raise
+            except Exception:
+                get_provider_router().record_failure(self.name, self.model)
+                raise
+
+    def record_success(self, seconds, ttfb, content, usage=None):
+        """Feed a successful call's latency and throughput to the router"""
+        completion_tokens = (usage or {}).get("completion_tokens") or estimate_tokens(content)
+        get_provider_router().record_success(self.name, self.model, seconds, ttfb, completion_tokens)
+
+    def record_http_timing(self, ttfb, body, connect=None, tls=None):
+        """Record one response's connection setup, time to first byte and body transfer times"""
+        recorder = get_latency_recorder()
+        for stage, seconds in (("llm_connect", connect), ("llm_tls", tls), ("llm_ttfb", ttfb), ("llm_body", body)):
+            if seconds is not None:
+                recorder.observe(stage, max(0.0, seconds), provider=self.name)
+
+    def latency_percentile(self, percentile):
+        """Return the given percentile of recent successful call latencies, or None without enough samples"""
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class ProviderClient(BaseProviderClient):
+    """Long-lived client for one OpenAI-compatible provider backed by a pooled keep-alive session"""
+
+    def __init__(self, name, config, pool_size=LLM_POOL_SIZE):
+        super().__init__(name, config)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def post(self, payload, api_key, stream=False, timeout=None):
+        """POST a payload over the pooled session, raising LLMProviderError on non-200 responses.
+
+        Without an explicit timeout the connect and read timeouts are what is left of the deadline.
+        """
+        try:
+            response = self.session.post(
+                self.url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json=payload,
+                timeout=timeout or request_timeout(),
+                stream=stream
+            )
+        except requests.RequestException as e:
+            # A timeout shrunk to fit the budget means the budget ran out, not that the provider failed
+            check_attempt_time(e)
+            raise
+
+        if response.status_code != 200:
+            error_detail = response.text[:200]
+            response.close()
+            raise LLMProviderError(
+                f"HTTP {response.status_code}: {error_detail}",
+                status_code=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+        return response
+
+    def complete(self, prompt, api_key, usage=None):
+        """Return the full completion text for a prompt, filling `usage` with its token counts"""
+        started = time.monotonic()
+        with self.attempt("complete") as labels:
+            response = self.post(self.build_payload(prompt), api_key)
+            result = response.json()
+            content = self.parse_completion(result)
+            labels["outcome"] = "ok"
+        elapsed = time.monotonic() - started
+        self.record_latency(elapsed)
+        # requests' elapsed ends when the headers are parsed and includes connecting when no pooled connection was free
+        ttfb = response.elapsed.total_seconds()
+        self.record_http_timing(ttfb, elapsed - ttfb)
+        self.fill_usage(usage, result.get("usage"), prompt, content)
+        self.record_success(elapsed, ttfb, content, result.get("usage"))
+        return content
+
+    def stream(self, prompt, api_key, usage=None):
+        """Yield completion text chunks for a prompt as they arrive, filling `usage` once the stream ends"""
+        reported = {}
+        chunks = []
+        started = time.monotonic()
+        with self.attempt("stream") as labels:
+            with self.post(self.build_payload(prompt, stream=True), api_key, stream=True) as response:
+                try:
+                    for chunk in _iter_sse_content(response, reported):
+                        # Read timeouts apply per chunk, so a slow trickle is cut off here
+                        check_deadline()
+                        chunks.append(chunk)
+                        yield chunk
+                except requests.RequestException as e:
+                    check_attempt_time(e)
+                    raise
+            labels["outcome"] = "ok"
+        ttfb = response.elapsed.total_seconds()
+        elapsed = time.monotonic() - started
+        self.record_http_timing(ttfb, elapsed - ttfb)
+        self.fill_usage(usage, reported, prompt, "".join(chunks))
+        self.record_success(elapsed, ttfb, "".join(chunks), reported)
+
+    def probe(self):
+        """Send the smallest possible completion request; raises when the provider is still failing"""
+        api_key = self.resolve_api_key()
+        if not api_key:
+            raise LLMProviderError(f"No API key found for {self.name}")
+        payload = {"model": self.model, "messages": [{"role": "user", "content": "ping"}], "max_tokens": 1}
+        self.post(payload, api_key, timeout=PROBE_TIMEOUT).close()
+
+    def close(self):
+        self.session.close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_provider_clients():
+    """Create one pooled client per provider, shared by every session in this process"""
+    return {name: ProviderClient(name, config) for name, config in LLM_PROVIDERS.items()}
+
+
+def get_provider_order(api_provider="groq"):
+    """Return provider names in static preference order, caller's choice first.
+
+    This is the identity used for cache keys and stats; the order calls are
+    actually attempted in comes from the ProviderRouter.
+    """
+    providers_to_try = [api_provider] if api_provider in LLM_PROVIDERS else []
+    providers_to_try.extend([p for p in PROVIDER_ORDER if p not in providers_to_try])
+    return providers_to_try
+
+
+def ensure_providers_available(clients=None):
+    """Raise ProvidersUnavailableError at once when every configured provider's circuit is open"""
+    wait_seconds = get_provider_router().unavailable_for(clients or get_provider_clients())
+    if wait_seconds is not None:
+        raise ProvidersUnavailableError(f"All API providers are failing; next health check in {wait_seconds:.0f}s")
+
+
+def attempt_share(remaining, typical, later):
+    """Seconds one provider attempt may use out of `remaining`, with `later` providers still to try.
+
+    A provider with a known typical answer time gets an even split, or longer if
+    it usually needs it. One that has not answered yet gets everything but a small
+    reserve for the next provider, since guessing its share too low would cut off
+    a slow but healthy provider.
+    """
+    if typical is None:
+        reserve = min(ATTEMPT_RESERVE_SECONDS, remaining / 2) if later else 0.0
+        share = remaining - reserve
+    else:
+        share = max(remaining / (later + 1), typical * ATTEMPT_HEADROOM)
+    return min(remaining, max(share, MIN_ATTEMPT_SECONDS))
+
+
+def _iter_provider_attempts(api_key=None, api_provider="groq", notify=None, clients=None):
+    """Yield (name, client, api_key, attempt_seconds) for each provider, fastest expected first, skipping open circuits.
+
+    attempt_seconds is the share of the remaining deadline the attempt may use
+    (None without a deadline), so a provider that hangs leaves time for the rest.
+    """
+    notify = notify or streamlit_notify
+    clients = clients or get_provider_clients()
+    ensure_providers_available(clients)
+
+    provider_names, skipped = get_provider_router().order(clients, api_provider)
+    for provider_name in skipped:
+        notify("info", f"⏭️ Skipping {provider_name.upper()}: failing repeatedly, cooling down")
+
+    out_of_time = []
+    tried = False
+    for index, provider_name in enumerate(provider_names):
+        client = clients[provider_name]
+        api_key = client.resolve_api_key(api_key)
+
+        if not api_key:
+            notify("warning", f"⚠️  No API key found for {provider_name}")
+            continue
+
+        attempt_seconds = None
+        remaining = time_remaining()
+        if remaining is not None:
+            typical = get_provider_router().answer_seconds(provider_name, client.model)
+            needed = max(MIN_ATTEMPT_SECONDS, typical or 0.0)
+            if remaining < needed:
+                notify("info", f"⏭️ Skipping {provider_name.upper()}: it usually needs ~{needed:.0f}s, {max(0.0, remaining):.0f}s left")
+                out_of_time.append(provider_name)
+                continue
+            later = sum(1 for name in provider_names[index + 1:] if clients[name].resolve_api_key())
+            attempt_seconds = attempt_share(remaining, typical, later)
+
+        tried = True
+        yield provider_name, client, api_key, attempt_seconds
+
+        # An explicit key only applies to the first provider tried
+        api_key = None
+
+    if out_of_time and not tried:
+        raise DeadlineExceededError(f"Time budget of {GENERATION_DEADLINE:.0f}s exhausted before trying {', '.join(out_of_time)}")
+
+
+def _iter_sse_content(response, usage=None):
+    """Yield content deltas from an OpenAI-compatible server-sent event stream, copying any usage into `usage`"""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+
+        if usage is not None and event.get("usage"):
+            usage.update(event["usage"])
+
+        choices = event.get("choices") or []
+        if choices:
+            delta = choices[0].get("delta") or {}
+            content = delta.get("content")
+            if content:
+                yield content
+
+
+def call_llm_api_stream(prompt, api_key=None, api_provider="groq", notify=None, usage=None):
+    """Stream a completion chunk by chunk, failing over only before the first chunk"""
+    notify = notify or streamlit_notify
+
+    last_error = None
+    retry_after = None
+
+    for provider_name, client, provider_key, attempt_seconds in _iter_provider_attempts(api_key, api_provider, notify):
+        started = False
+        try:
+            notify("info", f"🔄 Streaming from {provider_name.upper()}...")
+
+            attempt_usage = {}
+            chunks = client.stream(prompt, provider_key, attempt_usage)
+            # The attempt's share bounds the wait for the first chunk, the last point where failover is possible
+            with attempt_deadline(attempt_seconds):
+                first = next(chunks, None)
+            if first is None:
+                raise LLMProviderError(f"Empty stream from {provider_name}")
+
+            started = True
+            yield first
+            yield from chunks
+
+            notify("success", f"✅ Resume generated with {provider_name.upper()}!")
+            report_token_usage(attempt_usage, notify)
+            if usage is not None:
+                usage.update(attempt_usage)
+            return
+
+        except Exception as e:
+            # Once text has been handed to the caller we can't switch providers
+            if started:
+                raise
+            last_error = str(e)
+            retry_after = _earliest_retry_after(retry_after, e)
+            notify("warning", f"⚠️  {provider_name} failed: {str(e)[:100]}")
+            continue
+
+    raise LLMProviderError(f"All API providers failed. Last error: {last_error}", retry_after=retry_after)
+
+
+def _hedged_attempt(client, prompt, api_key, cancel, usage):
+    """Stream one provider's completion in a worker thread, abandoning it once cancelled"""
+    started = time.monotonic()
+    chunks = []
+    stream = client.stream(prompt, api_key, usage)
+    try:
+        for chunk in stream:
+            if cancel.is_set():
+                return None
+            chunks.append(chunk)
+    finally:
+        # Closing the generator closes the HTTP response and frees the connection
+        stream.close()
+
+    if not chunks:
+        raise LLMProviderError(f"Empty response from {client.name}")
+
+    client.record_latency(time.monotonic() - started)
+    return "".join(chunks)
+
+
+def call_llm_api_hedged(prompt, api_key=None, api_provider="groq", hedge_delay=None, validate=None, notify=None,
+                        usage=None):
+    """Race providers: start the primary, add a backup after hedge_delay and keep the first valid response"""
+    notify = notify or streamlit_notify
+
+    attempts = list(_iter_provider_attempts(api_key, api_provider, notify))
+    if not attempts:
+        raise LLMProviderError("All API providers failed. Last error: no API keys configured")
+
+    if hedge_delay is None:
+        if LLM_HEDGE_DELAY:
+            hedge_delay = float(LLM_HEDGE_DELAY)
+        else:
+            hedge_delay = attempts[0][1].latency_percentile(0.95) or DEFAULT_HEDGE_DELAY
+    # Attempts race instead of timing out, so the primary's share of the deadline only moves the backup up
+    primary_share = attempts[0][3]
+    if primary_share is not None:
+        hedge_delay = min(hedge_delay, primary_share)
+
+    cancel = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(attempts), thread_name_prefix="llm-hedge")
+    pending = {}
+    launched = []
+    last_error = None
+    retry_after = None
+
+    def launch_next():
+        provider_name, client, provider_key, _ = attempts[len(launched)]
+        launched.append(provider_name)
+        notify("info", f"🔄 Generating with {provider_name.upper()}...")
+        attempt_usage = {}
+        # Run in a copy of this context so the attempt's timings reach the current generation
+        future = executor.submit(contextvars.copy_context().run, _hedged_attempt, client, prompt, provider_key, cancel,
+                                 attempt_usage)
+        pending[future] = (provider_name, attempt_usage)
+
+    launch_next()
+
+    try:
+        while pending:
+            can_hedge = len(launched) < len(attempts)
+            timeout = hedge_delay if can_hedge else None
+            remaining = time_remaining()
+            if remaining is not None:
+                timeout = max(0.0, remaining) if timeout is None else min(timeout, max(0.0, remaining))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Out of budget: the finally block cancels whatever is still running
+                check_deadline()
+                notify("info", f"⏱️ No response after {hedge_delay:.1f}s, hedging with a backup provider...")
+                launch_next()
+                continue
+
+            for future in done:
+                provider_name, attempt_usage = pending.pop(future)
+                try:
+                    content = future.result()
+                    if validate is not None:
+                        validate(content)
+                    notify("success", f"✅ Resume generated with {provider_name.upper()}!")
+                    report_token_usage(attempt_usage, notify)
+                    if usage is not None:
+                        usage.update(attempt_usage)
+                    return content
+                except Exception as e:
+                    last_error = str(e)
+                    retry_after = _earliest_retry_after(retry_after, e)
+                    notify("warning", f"⚠️  {provider_name} failed: {str(e)[:100]}")
+
+            # A failed attempt is replaced right away instead of waiting for the hedge delay
+            if len(launched) < len(attempts):
+                launch_next()
+    finally:
+        cancel.set()
+        executor.shutdown(wait=False)
+
+    raise LLMProviderError(f"All API providers failed. Last error: {last_error}", retry_after=retry_after)
+
+
+class TokenBucket:
+    """asyncio token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Hold every caller back after the provider answered 429 with Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class AsyncProviderClient(BaseProviderClient):
+    """asyncio client for one provider with a concurrency cap and token-bucket rate limiting"""
+
+    def __init__(self, name, config, pool_size=LLM_POOL_SIZE):
+        super().__init__(name, config)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=LLM_TIMEOUT,
+            headers={"Content-Type": "application/json"}
+        )
+        self.semaphore = asyncio.Semaphore(provider_limit(name, "max_concurrency", pool_size))
+        rate = provider_limit(name, "requests_per_minute", 60) / 60.0
+        self.rate_limiter = TokenBucket(rate, capacity=max(1, int(rate * 10)))
+
+    async def wait_turn(self, waiter, limit):
+        """Await a local concurrency or rate limit slot, for no longer than the attempt has left, timed as limit_wait"""
+        with timed("limit_wait", provider=self.name, limit=limit) as labels:
+            try:
+                result = await asyncio.wait_for(waiter, attempt_time_remaining())
+            except asyncio.TimeoutError:
+                # Out of overall budget is the deadline's error; out of this attempt's share, try another provider
+                check_deadline(MIN_ATTEMPT_SECONDS)
+                raise AttemptTimeoutError(f"Timed out waiting for {self.name}'s {limit} limit") from None
+            labels["outcome"] = "ok"
+            return result
+
+    async def complete(self, prompt, api_key, usage=None):
+        """Return the full completion text, respecting the provider's concurrency and rate limits"""
+        await self.wait_turn(self.semaphore.acquire(), "concurrency")
+        try:
+            await self.wait_turn(self.rate_limiter.acquire(), "rate")
+            started = time.monotonic()
+            events = {}
+
+            async def trace(event, info):
+                events[event] = time.monotonic()
+
+            with self.attempt("complete") as labels:
+                # Waiting for the semaphore and rate limiter counts against the budget too
+                connect_timeout, read_timeout = request_timeout()
+                try:
+                    response = await self.client.post(
+                        self.url,
+                        headers={"Authorization": f"Bearer {api_key}"},
+                        json=self.build_payload(prompt),
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                        extensions={"trace": trace}
+                    )
+                except httpx.HTTPError as e:
+                    check_attempt_time(e)
+                    raise
+
+                if response.status_code != 200:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429 and retry_after is not None:
+                        self.rate_limiter.pause(min(retry_after, MAX_RETRY_AFTER))
+                    raise LLMProviderError(
+                        f"HTTP {response.status_code}: {response.text[:200]}",
+                        status_code=response.status_code,
+                        retry_after=retry_after
+                    )
+
+                result = response.json()
+                content = self.parse_completion(result)
+                labels["outcome"] = "ok"
+
+            finished = time.monotonic()
+            self.record_latency(finished - started)
+            self.record_trace_timing(events, finished)
+            self.fill_usage(usage, result.get("usage"), prompt, content)
+            ttfb = events.get("http11.receive_response_headers.complete", finished) - started
+            self.record_success(finished - started, ttfb, content, result.get("usage"))
+            return content
+        finally:
+            self.semaphore.release()
+
+    def record_trace_timing(self, events, finished):
+        """Turn httpcore trace events into connect (DNS + TCP), TLS, first-byte and body timings"""
+        def between(start, end):
+            if start in events and end in events:
+                return events[end] - events[start]
+            return None
+
+        headers_done = events.get("http11.receive_response_headers.complete")
+        if headers_done is None:
+            return
+        self.record_http_timing(
+            between("http11.send_request_headers.started", "http11.receive_response_headers.complete"),
+            events.get("http11.receive_response_body.complete", finished) - headers_done,
+            connect=between("connection.connect_tcp.started", "connection.connect_tcp.complete"),
+            tls=between("connection.start_tls.started", "connection.start_tls.complete")
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+async def call_llm_api_async(prompt, clients, api_key=None, api_provider="groq", notify=None, usage=None):
+    """Async failover across providers; a short 429 Retry-After is waited out on the same provider"""
+    notify = notify or streamlit_notify
+
+    last_error = None
+    retry_after = None
+
+    for provider_name, client, provider_key, attempt_seconds in _iter_provider_attempts(api_key, api_provider, notify, clients):
+        # One share of the deadline per provider, including a wait for its Retry-After
+        with attempt_deadline(attempt_seconds):
+            for attempt in range(2):
+                try:
+                    notify("info", f"🔄 Generating with {provider_name.upper()}...")
+
+                    attempt_usage = {}
+                    content = await client.complete(prompt, provider_key, attempt_usage)
+                    notify("success", f"✅ Resume generated with {provider_name.upper()}!")
+                    report_token_usage(attempt_usage, notify)
+                    if usage is not None:
+                        usage.update(attempt_usage)
+                    return content
+
+                except Exception as e:
+                    last_error = str(e)
+                    delay = getattr(e, "retry_after", None)
+                    if attempt == 0 and getattr(e, "status_code", None) == 429 and delay is not None and delay <= MAX_RETRY_AFTER:
+                        # The client's rate limiter already holds requests back until the delay passes
+                        notify("info", f"⏳ {provider_name} is rate limiting, retrying in {delay:.0f}s...")
+                        continue
+
+                    retry_after = _earliest_retry_after(retry_after, e)
+                    notify("warning", f"⚠️  {provider_name} failed: {str(e)[:100]}")
+                    break
+
+    raise LLMProviderError(f"All API providers failed. Last error: {last_error}", retry_after=retry_after)
+
+
+class AsyncLLMRuntime:
+    """One background event loop that owns the async provider clients for the whole process"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-async-loop", daemon=True)
+        self.thread.start()
+        self.clients = {name: AsyncProviderClient(name, config) for name, config in LLM_PROVIDERS.items()}
+
+    def submit(self, coroutine):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future; nothing blocks on it.
+
+        The coroutine starts with a copy of the caller's context (timings, deadline).
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, make_coroutine, notify=None):
+        """Run make_coroutine(relay_notify) on the loop and block until it finishes.
+
+        Notifications raised on the loop thread are relayed to `notify` on the
+        calling thread, so Streamlit messages still land in the right session.
+        """
+        notify = notify or streamlit_notify
+        messages = queue.Queue()
+        future = self.submit(make_coroutine(lambda level, message: messages.put((level, message))))
+        # The sentinel is queued after the coroutine's last message, so nothing is lost
+        future.add_done_callback(lambda _: messages.put(None))
+
+        for item in iter(messages.get, None):
+            notify(*item)
+        return future.result()
+
+    def call_llm_api(self, prompt, api_key=None, api_provider="groq", notify=None, usage=None):
+        """Blocking wrapper around call_llm_api_async for synchronous callers"""
+        return self.run(
+            lambda relay: call_llm_api_async(prompt, self.clients, api_key, api_provider, relay, usage),
+            notify
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def get_async_runtime():
+    """Process-wide async LLM runtime shared by every session"""
+    return AsyncLLMRuntime()
+
+
+# -----------------------------
+# RESPONSE CACHE
+# -----------------------------
+
+RESUME_CACHE_SIZE = int(os.environ.get("RESUME_CACHE_SIZE", "256"))
+RESUME_CACHE_TTL = int(os.environ.get("RESUME_CACHE_TTL", str(24 * 60 * 60)))
+# Optional SQLite file so cached resumes survive restarts and are shared between processes
+RESUME_CACHE_PATH = os.environ.get("RESUME_CACHE_PATH")
+
+
+def normalize_user_input(user_input):
+    """Normalize a description so trivially different inputs share a cache entry"""
+    normalized = re.sub(r"\s+", " ", user_input.lower()).strip()
+    return normalized.rstrip(" .!")
+
+
+def resume_cache_key(user_input, api_provider="groq"):
+    """Hash the normalized input with the primary provider, its model, prompt style and the prompt version"""
+    provider_name = get_provider_order(api_provider)[0]
+    parts = [
+        normalize_user_input(user_input),
+        provider_name,
+        LLM_PROVIDERS[provider_name]["model"],
+        provider_prompt_style(provider_name),
+        ResumeTemplates.PROMPT_VERSION
+    ]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class ResumeCache:
+    """LRU cache of parsed resume data with a TTL and an optional SQLite backing file"""
+
+    def __init__(self, max_entries=RESUME_CACHE_SIZE, ttl=RESUME_CACHE_TTL, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS resume_cache "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self.db.commit()
+
+    def get(self, key):
+        """Return cached resume data for key, or None when missing or expired"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute(
+                    "SELECT created, data FROM resume_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, entry)
+
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            # Hand out a copy so callers can't mutate the cached value
+            return json.loads(json.dumps(entry[1]))
+
+    def set(self, key, resume_data):
+        entry = (time.time(), json.loads(json.dumps(resume_data)))
+        with self.lock:
+            self._remember(key, entry)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO resume_cache (key, created, data) VALUES (?, ?, ?)",
+                    (key, entry[0], json.dumps(resume_data))
+                )
+                self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM resume_cache")
+                self.db.commit()
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _forget(self, key):
+        self.entries.pop(key, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM resume_cache WHERE key = ?", (key,))
+            self.db.commit()
+
+
+@st.cache_resource(show_spinner=False)
+def get_resume_cache():
+    """Process-wide resume cache shared by every session"""
+    return ResumeCache(path=RESUME_CACHE_PATH)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution whose result or error they all share"""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn, on_join=None):
+        """Run fn() unless a call with this key is already in flight, in which case wait for its outcome"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if on_join is not None:
+                on_join()
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    def submit(self, key, start, on_join=None):
+        """Non-blocking do(): start() returns a concurrent Future, and so does this, shared by every caller"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if on_join is not None:
+                on_join()
+            return call
+
+        def settle(future):
+            with self.lock:
+                del self.calls[key]
+            error = future.exception()
+            if error is not None:
+                call.set_exception(error)
+            else:
+                call.set_result(future.result())
+
+        try:
+            start().add_done_callback(settle)
+        except BaseException as e:
+            failed = Future()
+            failed.set_exception(e)
+            settle(failed)
+        return call
+
+
+@st.cache_resource(show_spinner=False)
+def get_generation_flight():
+    """Process-wide single-flight for generations, keyed like the resume cache"""
+    return SingleFlight()
+
+
+# -----------------------------
+# RESUME MODEL
+# -----------------------------
+
+def _compile_normalizer(schema, path):
+    """Compile a JSON Schema fragment into a function (value, issues) -> normalized value.
+
+    Wrong types are coerced where the intent is clear (a string where a list is
+    expected becomes a one-item list, a number becomes text) and each coercion is
+    recorded in `issues`. Objects that can't be used normalize to None.
+    """
+    kind = schema["type"]
+
+    if kind == "string":
+        def normalize(value, issues):
+            if isinstance(value, str):
+                return value
+            if value is None:
+                return ""
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            if isinstance(value, list) and all(isinstance(item, (str, int, float)) for item in value):
+                issues.append(f"{path}: expected text, got a list")
+                return ", ".join(str(item) for item in value)
+            issues.append(f"{path}: expected text, got {type(value).__name__}")
+            return ""
+        return normalize
+
+    if kind == "array":
+        normalize_item = _compile_normalizer(schema["items"], f"{path}[]")
+        of_strings = schema["items"]["type"] == "string"
+
+        def normalize(value, issues):
+            if value is None:
+                return []
+            # Fast path for the common, already-valid list of non-empty strings
+            if of_strings and type(value) is list and all(type(item) is str and item for item in value):
+                return list(value)
+            if not isinstance(value, list):
+                issues.append(f"{path}: expected a list, got {type(value).__name__}")
+                value = [value]
+            items = [normalize_item(item, issues) for item in value]
+            # Drop blank strings and unusable objects
+            return [item for item in items if item]
+        return normalize
+
+    if "properties" in schema:
+        fields = tuple((name, _compile_normalizer(sub, f"{path}.{name}")) for name, sub in schema["properties"].items())
+
+        def normalize(value, issues):
+            if not isinstance(value, dict):
+                if value is not None:
+                    issues.append(f"{path}: expected an object, got {type(value).__name__}")
+                return None
+            return {name: normalize_field(value.get(name), issues) for name, normalize_field in fields}
+        return normalize
+
+    normalize_value = _compile_normalizer(schema["additionalProperties"], f"{path}{{}}")
+
+    def normalize(value, issues):
+        if isinstance(value, list):
+            issues.append(f"{path}: expected categories, got a list")
+            value = {"Skills": value}
+        elif not isinstance(value, dict):
+            if value is not None:
+                issues.append(f"{path}: expected an object, got {type(value).__name__}")
+            return {}
+        return {str(key): normalize_value(item, issues) for key, item in value.items()}
+    return normalize
+
+
+@st.cache_resource(show_spinner=False)
+def get_section_normalizers():
+    """Normalizers compiled once per process from the same schema sent to providers in JSON-schema mode"""
+    return MappingProxyType({
+        key: _compile_normalizer(schema, key) for key, schema in SECTION_JSON_SCHEMAS.items()
+    })
+
+
+SECTION_NORMALIZERS = get_section_normalizers()
+
+
+def validate_resume(resume_data):
+    """Normalize raw resume data into a ResumeModel; returns (model, issues) where issues lists every repair"""
+    issues = []
+    if not isinstance(resume_data, dict):
+        issues.append(f"resume: expected an object, got {type(resume_data).__name__}")
+        resume_data = {}
+
+    values = {key: normalize(resume_data.get(key), issues) for key, normalize in SECTION_NORMALIZERS.items()}
+    return ResumeModel(
+        contact=ContactInfo(**(values["contact"] or {})),
+        professional_summary=values["professional_summary"],
+        technical_skills=values["technical_skills"],
+        experience=[ExperienceEntry(**entry) for entry in values["experience"]],
+        projects=[ProjectEntry(**entry) for entry in values["projects"]],
+        education=[EducationEntry(**entry) for entry in values["education"]],
+        certifications=values["certifications"],
+        achievements=values["achievements"]
+    ), issues
+
+
+# -----------------------------
+# HTML GENERATION (A4 OPTIMIZED)
+# -----------------------------
+
+# Static document parts are built once at import; only the per-resume values are formatted
+RESUME_CSS = """
+        @page {
+            size: A4;
+            margin: 0;
+        }
+
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+
+        body {
+            font-family: 'Calibri', 'Arial', sans-serif;
+            font-size: 9.5pt;
+            line-height: 1.25;
+            color: #333;
+            background: white;
+            width: 210mm;
+            min-height: 297mm;
+            max-height: 297mm;
+            margin: 0 auto;
+            padding: 12mm 15mm;
+            overflow: hidden;
+        }
+
+        .header {
+            text-align: center;
+            margin-bottom: 10pt;
+            padding-bottom: 6pt;
+            border-bottom: 2pt solid #1F4E79;
+        }
+
+        .name {
+            font-size: 18pt;
+            font-weight: bold;
+            color: #1F4E79;
+            margin-bottom: 3pt;
+            letter-spacing: 0.5pt;
+        }
+
+        .contact-info {
+            font-size: 8.5pt;
+            color: #595959;
+            margin-top: 2pt;
+            line-height: 1.3;
+        }
+
+        .contact-info a {
+            color: #595959;
+            text-decoration: none;
+        }
+
+        .section {
+            margin-bottom: 8pt;
+            page-break-inside: avoid;
+        }
+
+        .section-title {
+            font-size: 11pt;
+            font-weight: bold;
+            color: #1F4E79;
+            text-transform: uppercase;
+            margin-bottom: 4pt;
+            padding-bottom: 1pt;
+            border-bottom: 1pt solid #1F4E79;
+            letter-spacing: 0.3pt;
+        }
+
+        .entry {
+            margin-bottom: 6pt;
+            page-break-inside: avoid;
+        }
+
+        .entry-header {
+            font-weight: bold;
+            margin-bottom: 1pt;
+            font-size: 9.5pt;
+        }
+
+        .entry-subheader {
+            font-size: 8.5pt;
+            color: #595959;
+            margin-bottom: 2pt;
+            line-height: 1.2;
+        }
+
+        .entry-details {
+            margin-left: 12pt;
+        }
+
+        .bullet {
+            margin-bottom: 1.5pt;
+            padding-left: 10pt;
+            text-indent: -10pt;
+            line-height: 1.25;
+        }
+
+        .skills-grid {
+            display: grid;
+            grid-template-columns: 1fr;
+            gap: 2pt;
+        }
+
+        .skill-category {
+            margin-bottom: 1.5pt;
+            line-height: 1.2;
+        }
+
+        .skill-label {
+            font-weight: bold;
+            display: inline;
+        }
+
+        .summary {
+            text-align: justify;
+            margin-bottom: 6pt;
+            line-height: 1.3;
+        }
+
+        @media print {
+            body {
+                margin: 0;
+                padding: 12mm 15mm;
+                width: 210mm;
+                height: 297mm;
+            }
+
+            .section {
+                page-break-inside: avoid;
+            }
+        }
+"""
+
+_HTML_HEAD_OPEN = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>"""
+
+# Kept as one constant so the PDF renderer can swap it for its pre-parsed stylesheet
+RESUME_STYLE_BLOCK = "<style>" + RESUME_CSS + "    </style>"
+
+_HTML_HEAD_STYLE = """</title>
+    """ + RESUME_STYLE_BLOCK
+
+# A fitted layout's override <style> goes between these two
+_HTML_HEAD_CLOSE = """
+</head>
+<body>
+    <div class="header">
+        <div class="name">"""
+
+_HTML_SKILLS_OPEN = """
+    <div class="section">
+        <div class="section-title">Technical Skills</div>
+        <div class="skills-grid">
+"""
+
+_HTML_ENTRY_CLOSE = """            </div>
+        </div>
+"""
+
+_HTML_LIST_CLOSE = """        </div>
     </div>
 """
 
-    html_content += """
-</body>
-</html>"""
+_HTML_DOCUMENT_CLOSE = """
+</body>
+</html>"""
+
+
+def _render_bullet_list(parts, title, items):
+    """Append a titled section of plain bullets (certifications, achievements)"""
+    parts.append(f"""
+    <div class="section">
+        <div class="section-title">{title}</div>
+        <div class="entry-details">
+""")
+    for item in items:
+        parts.append(f"""            <div class="bullet">• {item}</div>\n""")
+    parts.append(_HTML_LIST_CLOSE)
+
+
+def generate_html_resume(resume, layout=DEFAULT_LAYOUT):
+    """Generate a professional single-page A4 HTML resume from a ResumeModel (raw dicts are validated first)"""
+    if not isinstance(resume, ResumeModel):
+        resume = validate_resume(resume)[0]
+
+    contact = resume.contact
+
+    # Fragments are f-strings, compiled once with the module; the document is joined once at the end
+    parts = [
+        _HTML_HEAD_OPEN,
+        contact.name or 'Professional Resume',
+        _HTML_HEAD_STYLE,
+        layout.override_css(),
+        _HTML_HEAD_CLOSE,
+        f"""{contact.name or 'Your Name'}</div>
+        <div class="contact-info">
+            {contact.email} | {contact.phone} | {contact.location}
+        </div>
+        <div class="contact-info">""",
+        " | ".join([link for link in (contact.linkedin, contact.github, contact.portfolio) if link]),
+        """
+        </div>
+    </div>
+"""
+    ]
+    append = parts.append
+
+    # Professional Summary
+    if resume.professional_summary:
+        append(f"""
+    <div class="section">
+        <div class="section-title">Professional Summary</div>
+        <div class="summary">{resume.professional_summary}</div>
+    </div>
+""")
+
+    # Education
+    if resume.education:
+        append("""
+    <div class="section">
+        <div class="section-title">Education</div>
+""")
+        for edu in resume.education:
+            append(f"""
+        <div class="entry">
+            <div class="entry-header">{edu.degree}</div>
+            <div class="entry-subheader">
+                {edu.institution} | {edu.location} | {edu.graduation}""")
+            if edu.gpa:
+                append(f" | GPA: {edu.gpa}")
+            append("</div>")
+
+            if edu.honors:
+                append(f"<div class='entry-subheader'>Honors: {', '.join(edu.honors[:layout.honors])}</div>")
+            if edu.relevant_coursework:
+                append(f"<div class='entry-subheader'>Coursework: {', '.join(edu.relevant_coursework[:layout.coursework])}</div>")
+
+            append("</div>")
+        append("    </div>\n")
+
+    # Technical Skills
+    if resume.technical_skills:
+        append(_HTML_SKILLS_OPEN)
+        for category, skills in resume.technical_skills.items():
+            if skills:
+                append(f"""
+            <div class="skill-category">
+                <span class="skill-label">{category}:</span> {', '.join(skills)}
+            </div>
+""")
+        append(_HTML_LIST_CLOSE)
+
+    # Experience
+    if resume.experience:
+        append("""
+    <div class="section">
+        <div class="section-title">Professional Experience</div>
+""")
+        for exp in resume.experience:
+            append(f"""
+        <div class="entry">
+            <div class="entry-header">{exp.title} | {exp.company}</div>
+            <div class="entry-subheader">{exp.location} | {exp.duration}</div>
+            <div class="entry-details">
+""")
+            for achievement in exp.achievements[:layout.role_bullets]:
+                append(f"""                <div class="bullet">• {achievement}</div>\n""")
+            append(_HTML_ENTRY_CLOSE)
+        append("    </div>\n")
+
+    # Projects
+    if resume.projects:
+        append("""
+    <div class="section">
+        <div class="section-title">Projects</div>
+""")
+        for project in resume.projects[:layout.projects]:
+            append(f"""
+        <div class="entry">
+            <div class="entry-header">{project.title}</div>
+            <div class="entry-subheader">{project.technologies}""")
+            if project.duration:
+                append(f" | {project.duration}")
+
+            project_links = []
+            if project.github:
+                project_links.append(f"GitHub: {project.github}")
+            if project.demo:
+                project_links.append(f"Demo: {project.demo}")
+            if project_links:
+                append(f" | {' | '.join(project_links)}")
+
+            append("</div>\n            <div class='entry-details'>\n")
+            for desc in project.description[:layout.project_bullets]:
+                append(f"""                <div class="bullet">• {desc}</div>\n""")
+            append(_HTML_ENTRY_CLOSE)
+        append("    </div>\n")
+
+    # Certifications
+    if resume.certifications:
+        _render_bullet_list(parts, "Certifications", resume.certifications[:layout.list_items])
+
+    # Achievements
+    if resume.achievements:
+        _render_bullet_list(parts, "Achievements & Awards", resume.achievements[:layout.list_items])
+
+    append(_HTML_DOCUMENT_CLOSE)
+    return "".join(parts)
 
-    return html_content
+
+# -----------------------------
+# ONE-PAGE FIT
+# -----------------------------
+
+PT_TO_MM = 25.4 / 72
+# Content box of the A4 body in RESUME_CSS: 210 x 297mm minus 15mm / 12mm padding
+PAGE_CONTENT_WIDTH_MM = 210 - 2 * 15
+PAGE_CONTENT_HEIGHT_MM = 297 - 2 * 12
+
+# Arial/Helvetica advance widths in 1/1000 em for ASCII 32-126. Calibri is narrower where it
+# is installed and falls back to Arial elsewhere, so measuring with Arial errs toward fitting.
+_ARIAL_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584
+)
+_DEFAULT_CHAR_WIDTH = 556
+_BULLET_WIDTH = 350
+# Arial Bold runs about 8% wider than regular
+_BOLD_WIDTH_FACTOR = 1.08
+
+# Item limits trimmed one at a time, least important first, from a resume's full counts
+# down to the default layout before FIT_STEPS apply
+TRIM_ORDER = ("list_items", "project_bullets", "honors", "coursework", "projects", "role_bullets")
+
+# Adjustments tried in order, each on top of the previous, until the estimate fits:
+# typography tightens first, then the least important items are dropped
+FIT_STEPS = (
+    {"spacing_scale": 0.8},
+    {"line_height_scale": 0.94},
+    {"font_scale": 0.95},
+    {"list_items": 2},
+    {"project_bullets": 1},
+    {"spacing_scale": 0.6},
+    {"font_scale": 0.9},
+    {"coursework": 2, "honors": 1},
+    {"projects": 2},
+    {"role_bullets": 2},
+    {"projects": 1},
+    {"line_height_scale": 0.88}
+)
+
+
+@lru_cache(maxsize=None)
+def char_widths(size_pt, bold=False):
+    """Per-character advance widths in mm for one font size and weight, cached"""
+    scale = size_pt * PT_TO_MM / 1000 * (_BOLD_WIDTH_FACTOR if bold else 1.0)
+    widths = {chr(32 + index): width * scale for index, width in enumerate(_ARIAL_WIDTHS)}
+    widths["•"] = _BULLET_WIDTH * scale
+    widths[None] = _DEFAULT_CHAR_WIDTH * scale
+    return MappingProxyType(widths)
+
+
+def count_lines(text, width_mm, size_pt, bold=False):
+    """Lines a paragraph wraps to at the given width, using greedy word wrap like the browser"""
+    if not text:
+        return 0
+    widths = char_widths(size_pt, bold)
+    default = widths[None]
+    space = widths[" "]
+
+    lines = 1
+    line_width = 0.0
+    for word in text.split():
+        word_width = sum([widths.get(char, default) for char in word])
+        if line_width and line_width + space + word_width > width_mm:
+            lines += 1
+            line_width = word_width
+        else:
+            line_width += space + word_width if line_width else word_width
+    return lines
+
+
+def estimate_resume_height(resume, layout=DEFAULT_LAYOUT):
+    """Estimated height in mm of the rendered resume content, mirroring generate_html_resume"""
+    font, line, space = layout.font, layout.line_height, layout.space
+    body, small = font("body"), font("small")
+    width = PAGE_CONTENT_WIDTH_MM
+    bullet_width = width - (SPACING["details_indent"] + SPACING["bullet_indent"]) * PT_TO_MM
+
+    def block(text, size, line_height, block_width=width, bold=False):
+        return count_lines(text, block_width, size, bold) * size * line_height
+
+    def bullets(items):
+        return sum(block(f"• {item}", body, line("body"), bullet_width) + space("bullet_margin") for item in items)
+
+    def entry_header(text):
+        return block(text, body, line("body"), bold=True) + space("entry_header_margin")
+
+    def subheader(text):
+        return block(text, small, line("subheader")) + space("subheader_margin")
+
+    # Heights are accumulated in pt; a section's last bottom margin collapses into the section margin
+    sections = []
+
+    if resume.professional_summary:
+        sections.append((block(resume.professional_summary, body, line("summary")), space("summary_margin")))
+
+    if resume.education:
+        height = 0.0
+        for edu in resume.education:
+            height += entry_header(edu.degree)
+            height += subheader(" | ".join([edu.institution, edu.location, edu.graduation] + ([f"GPA: {edu.gpa}"] if edu.gpa else [])))
+            if edu.honors:
+                height += subheader("Honors: " + ", ".join(edu.honors[:layout.honors]))
+            if edu.relevant_coursework:
+                height += subheader("Coursework: " + ", ".join(edu.relevant_coursework[:layout.coursework]))
+            height += space("entry_margin")
+        sections.append((height - space("entry_margin"), space("entry_margin")))
+
+    if resume.technical_skills:
+        rows = [f"{category}: {', '.join(skills)}" for category, skills in resume.technical_skills.items() if skills]
+        height = sum(block(row, body, line("skill")) + space("bullet_margin") for row in rows)
+        height += space("skills_gap") * max(0, len(rows) - 1)
+        sections.append((height, 0.0))
+
+    if resume.experience:
+        height = 0.0
+        for exp in resume.experience:
+            height += entry_header(f"{exp.title} | {exp.company}")
+            height += subheader(f"{exp.location} | {exp.duration}")
+            height += bullets(exp.achievements[:layout.role_bullets]) + space("entry_margin")
+        sections.append((height - space("entry_margin"), space("entry_margin")))
+
+    if resume.projects:
+        height = 0.0
+        for project in resume.projects[:layout.projects]:
+            links = [f"GitHub: {project.github}"] if project.github else []
+            links += [f"Demo: {project.demo}"] if project.demo else []
+            height += entry_header(project.title)
+            height += subheader(" | ".join([project.technologies] + ([project.duration] if project.duration else []) + links))
+            height += bullets(project.description[:layout.project_bullets]) + space("entry_margin")
+        sections.append((height - space("entry_margin"), space("entry_margin")))
+
+    for items in (resume.certifications, resume.achievements):
+        if items:
+            sections.append((bullets(items[:layout.list_items]), 0.0))
+
+    contact = resume.contact
+    links = " | ".join([link for link in (contact.linkedin, contact.github, contact.portfolio) if link])
+    total = font("name") * line("body") + space("name_margin")
+    total += space("contact_margin") + block(f"{contact.email} | {contact.phone} | {contact.location}", small, line("contact"))
+    total += space("contact_margin") + block(links, small, line("contact"))
+    total += space("header_padding") + SPACING["header_border"] + space("header_margin")
+
+    title = font("title") * line("body") + space("title_padding") + SPACING["title_border"] + space("title_margin")
+    for height, trailing_margin in sections:
+        total += title + height + max(trailing_margin, space("section_margin"))
+
+    return total * PT_TO_MM
+
+
+def full_layout(resume):
+    """The default typography with every item limit raised to show all of this resume's items"""
+    education = resume.education
+    counts = {
+        "honors": max([len(edu.honors) for edu in education], default=0),
+        "coursework": max([len(edu.relevant_coursework) for edu in education], default=0),
+        "role_bullets": max([len(exp.achievements) for exp in resume.experience], default=0),
+        "projects": len(resume.projects),
+        "project_bullets": max([len(project.description) for project in resume.projects], default=0),
+        "list_items": max(len(resume.certifications), len(resume.achievements))
+    }
+    # Never below the defaults, so FIT_STEPS only ever lower a limit
+    return replace(DEFAULT_LAYOUT, **{name: max(count, getattr(DEFAULT_LAYOUT, name)) for name, count in counts.items()})
+
+
+def _fit_candidates(resume):
+    """Layouts from every item shown to the tightest, each one step smaller than the last"""
+    layout = full_layout(resume)
+    yield layout
+    for name in TRIM_ORDER:
+        while getattr(layout, name) > getattr(DEFAULT_LAYOUT, name):
+            layout = replace(layout, **{name: getattr(layout, name) - 1})
+            yield layout
+    for step in FIT_STEPS:
+        layout = replace(layout, **step)
+        yield layout
+
+
+def fit_to_one_page(resume, max_height_mm=PAGE_CONTENT_HEIGHT_MM):
+    """Return (layout, estimated_height_mm) for the first layout whose estimate fits one page.
+
+    Starts from every item the resume has, trims items beyond the default
+    limits one at a time, then applies FIT_STEPS. Deterministic and needs no
+    LLM call; if even the tightest layout overflows, that layout is returned anyway.
+    """
+    for layout in _fit_candidates(resume):
+        height = estimate_resume_height(resume, layout)
+        if height <= max_height_mm:
+            break
+    return layout, height
+
+
+def describe_layout(layout, resume=None):
+    """Short human-readable list of how a layout tightens the default, or hides items of `resume`"""
+    baseline = full_layout(resume) if resume is not None else DEFAULT_LAYOUT
+    changes = []
+    if layout.font_scale != DEFAULT_LAYOUT.font_scale:
+        changes.append(f"{layout.font('body'):.1f}pt text")
+    if layout.line_height_scale != DEFAULT_LAYOUT.line_height_scale or layout.spacing_scale != DEFAULT_LAYOUT.spacing_scale:
+        changes.append("tighter spacing")
+    for name, label in (("role_bullets", "bullets per role"), ("projects", "projects"),
+                        ("project_bullets", "bullets per project"), ("list_items", "certifications/achievements"),
+                        ("coursework", "courses"), ("honors", "honors")):
+        if getattr(layout, name) < getattr(baseline, name):
+            changes.append(f"{getattr(layout, name)} {label}")
+    return changes
+
+
+# -----------------------------
+# PDF EXPORT
+# -----------------------------
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_renderer():
+    """Warm WeasyPrint worker pool shared by every session, or None when WeasyPrint can't be imported"""
+    if not PDF_AVAILABLE:
+        return None
+    return PDFRenderer(RESUME_CSS, RESUME_STYLE_BLOCK)
+
+
+def render_resume_pdf(html_content, notify=None):
+    """Return PDF bytes for a rendered resume, or None when PDF export is unavailable"""
+    notify = notify or streamlit_notify
+    renderer = get_pdf_renderer()
+    if renderer is None or renderer.broken:
+        return None
+    try:
+        return renderer.render(html_content)
+    except PDFExportError as e:
+        notify("warning", f"⚠️ PDF export unavailable: {str(e)[:150]}")
+        return None
 
 
 # -----------------------------
 # JSON EXTRACTION & PARSING
 # -----------------------------
 
-def extract_json_from_response(response_text):
+# Inside an object only strings and braces matter; strings are matched whole so braces in them are skipped.
+# The string branch is the unrolled-loop form, which cannot backtrack catastrophically.
+_JSON_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]')
+_JSON_OBJECT_START = re.compile(r'\{\s*["}]')
+
+# Times the scanner may restart after a stray "{" in prose left an object unclosed
+MAX_JSON_RESCANS = 4
+
+
+def scan_json_objects(text):
+    """Return (start, end) spans of balanced top-level {...} objects in a single left-to-right pass.
+
+    Braces inside JSON strings are ignored, and prose or code fences between
+    objects are skipped with str.find rather than tokenized.
+    """
+    spans = []
+    rescans = 0
+    pos = text.find("{")
+
+    while pos != -1:
+        depth = 0
+        end = None
+
+        for token in _JSON_TOKEN.finditer(text, pos):
+            char = token.group()
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    end = token.end()
+                    break
+
+        if end is not None:
+            spans.append((pos, end))
+            pos = text.find("{", end)
+        elif rescans < MAX_JSON_RESCANS and not _JSON_OBJECT_START.match(text, pos):
+            # An unclosed brace that doesn't open a JSON object is prose; retry from the next one.
+            # One that does is truncated output, and its nested objects must not pass as the result.
+            rescans += 1
+            pos = text.find("{", pos + 1)
+        else:
+            break
+
+    return spans
+
+
+_CODE_FENCE = re.compile(r'```(?:json)?\s*')
+
+
+def _best_json_object(text):
+    """Parse candidate objects largest first, each at most once; prefer one with a 'contact' key"""
+    best = None
+    spans = sorted(scan_json_objects(text), key=lambda span: span[0] - span[1])
+
+    for start, end in spans:
+        candidate = text[start:end]
+        # Once a fallback exists, only objects that could hold the resume are worth parsing
+        if best is not None and '"contact"' not in candidate:
+            continue
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(parsed, dict):
+            continue
+        if 'contact' in parsed:
+            return parsed
+        if best is None:
+            best = parsed
+
+    return best
+
+
+def parse_json_response(response_text):
+    """Extract and parse JSON from LLM response, raising ValueError when nothing parses"""
+    parsed = _best_json_object(response_text)
+
+    # Stray fence markers inside the object break it; strip them and scan once more
+    if parsed is None and "```" in response_text:
+        parsed = _best_json_object(_CODE_FENCE.sub("", response_text))
+
+    if parsed is not None:
+        return parsed
+
+    raise ValueError("Could not extract valid JSON from response. The AI may have returned malformed data.")
+
+
+def extract_json_from_response(response_text, notify=None):
     """Extract and parse JSON from LLM response with enhanced error handling"""
-    
-    # First try: Direct JSON parse
+    notify = notify or streamlit_notify
     try:
-        cleaned = response_text.strip()
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
-        pass
-    
-    # Second try: Remove markdown code blocks
+        return parse_json_response(response_text)
+    except ValueError:
+        notify("error", "🔍 DEBUG: Could not parse JSON. Response preview:")
+        notify("code", response_text[:500] + "..." if len(response_text) > 500 else response_text)
+        raise
+
+
+class ParseStats:
+    """Process-wide counts of how LLM responses parsed, split by the response format that was requested.
+
+    Outcomes are "clean" (parsed as-is), "repaired" (salvaged by repair_resume_json)
+    and "failed" (unusable, costing a retry round trip).
+    """
+
+    OUTCOMES = ("clean", "repaired", "failed")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, response_format, outcome):
+        with self.lock:
+            counts = self.counts.setdefault(response_format, dict.fromkeys(self.OUTCOMES, 0))
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {response_format: dict(counts) for response_format, counts in self.counts.items()}
+
+
+@st.cache_resource(show_spinner=False)
+def get_parse_stats():
+    """One parse-outcome counter shared by every session in this process"""
+    return ParseStats()
+
+
+def record_parse_outcome(outcome, usage):
+    """Count a parse outcome under the response format of the provider that answered, from its usage dict"""
+    get_parse_stats().record(usage.get("response_format", "unknown"), outcome)
+
+
+def _strip_trailing_comma(chars):
+    """Drop trailing whitespace and one dangling comma from a list of output characters"""
+    while chars and chars[-1].isspace():
+        chars.pop()
+    if chars and chars[-1] == ",":
+        chars.pop()
+
+
+def repair_json_text(text):
+    """Best-effort parse of truncated or sloppy JSON starting at the first '{'.
+
+    Strips // and /* */ comments and trailing commas, closes an unterminated
+    string and any open arrays/objects. If that still doesn't parse, cuts back
+    to the last complete member and closes from there. Returns
+    (parsed_dict, was_truncated) or (None, False).
+    """
+    start = text.find("{")
+    if start == -1:
+        return None, False
+
+    out = []
+    closers = []
+    # (output length, closers) where the output can be cut and closed cleanly
+    cuts = []
+    in_string = False
+    escape = False
+    i = start
+    n = len(text)
+
+    while i < n:
+        char = text[i]
+        i += 1
+
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char == "/" and text.startswith("//", i - 1):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+        elif char == "/" and text.startswith("/*", i - 1):
+            comment_end = text.find("*/", i + 1)
+            i = n if comment_end == -1 else comment_end + 2
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+            cuts.append((len(out), tuple(closers)))
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if closers:
+                closers.pop()
+            out.append(char)
+            if not closers:
+                break
+        elif char == ",":
+            cuts.append((len(out), tuple(closers)))
+            out.append(char)
+        else:
+            out.append(char)
+
+    truncated = bool(closers)
+    candidates = []
+
+    if truncated:
+        tail = out[:]
+        if in_string:
+            if escape:
+                tail.pop()
+            tail.append('"')
+        _strip_trailing_comma(tail)
+        candidates.append("".join(tail) + "".join(reversed(closers)))
+    else:
+        candidates.append("".join(out))
+
+    # Fall back to the most recent clean cut points
+    for length, open_closers in reversed(cuts[-20:]):
+        head = out[:length]
+        _strip_trailing_comma(head)
+        candidates.append("".join(head) + "".join(reversed(open_closers)))
+
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed, truncated
+
+    return None, False
+
+
+def repair_resume_json(response_text):
+    """Salvage a truncated or sloppy resume response.
+
+    Returns (resume_data, missing_sections); resume_data is None when nothing
+    usable could be recovered. When the output was cut off, the last section
+    present is treated as incomplete and listed as missing too.
+    """
+    resume_data, truncated = repair_json_text(response_text)
+    if not resume_data or not any(key in resume_data for key in RESUME_SECTIONS):
+        return None, list(RESUME_SECTIONS)
+
+    missing = [key for key in RESUME_SECTIONS if not resume_data.get(key)]
+    if truncated:
+        last_key = next(reversed(resume_data))
+        if last_key in RESUME_SECTIONS and last_key not in missing:
+            missing.append(last_key)
+
+    return resume_data, missing
+
+
+class IncrementalJSONParser:
+    """Parse a streamed JSON object and emit each top-level key as soon as its value closes"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+        self.done = False
+        self.result = {}
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return a list of newly completed (key, value) pairs"""
+        completed = []
+        if self.done:
+            return completed
+
+        self.buffer += chunk
+        buffer = self.buffer
+
+        while self.pos < len(buffer):
+            char = buffer[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Strings only count once we're inside the object (skips prose before it)
+                if self.depth > 0:
+                    self.in_string = True
+            elif char in "{[":
+                if self.depth > 0:
+                    self.depth += 1
+                elif char == "{":
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif char in "}]":
+                if self.depth == 1:
+                    self._emit_member(self.pos, completed)
+                    self.depth = 0
+                    self.done = True
+                    break
+                if self.depth > 0:
+                    self.depth -= 1
+            elif char == "," and self.depth == 1:
+                self._emit_member(self.pos, completed)
+                self.member_start = self.pos + 1
+
+            self.pos += 1
+
+        return completed
+
+    def _emit_member(self, end, completed):
+        """Parse the `"key": value` text between member_start and end"""
+        member = self.buffer[self.member_start:end].strip()
+        if not member:
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return
+        for key, value in parsed.items():
+            self.result[key] = value
+            completed.append((key, value))
+
+
+# -----------------------------
+# GENERATION PIPELINE
+# -----------------------------
+
+MAX_RETRIES = 3
+RETRY_DELAY = 2
+
+
+def validate_resume_text(response_text):
+    """Accept a response that parses as-is or can be repaired; raise ValueError otherwise"""
     try:
-        cleaned = re.sub(r'```json\s*','', response_text)
-        cleaned = re.sub(r'```\s*','', cleaned)
-        cleaned = cleaned.strip()
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
+        parse_json_response(response_text)
+    except ValueError:
+        if repair_resume_json(response_text)[0] is None:
+            raise
+
+
+def request_resume_text(prompt, mode="sequential", notify=None, on_section=None, usage=None):
+    """Run one generation attempt in the given mode and return the raw LLM response text"""
+    with timed("llm_call", mode=mode) as labels:
+        text = _request_resume_text(prompt, mode, notify, on_section, usage)
+        labels["outcome"] = "ok"
+    return text
+
+
+def _request_resume_text(prompt, mode, notify, on_section, usage):
+    if mode == "stream":
+        parser = IncrementalJSONParser()
+        chunks = []
+        for chunk in call_llm_api_stream(prompt, notify=notify, usage=usage):
+            chunks.append(chunk)
+            if on_section is not None:
+                for key, value in parser.feed(chunk):
+                    on_section(key, value)
+        return "".join(chunks)
+
+    if mode == "hedged":
+        return call_llm_api_hedged(prompt, validate=validate_resume_text, notify=notify, usage=usage)
+
+    return get_async_runtime().call_llm_api(prompt, notify=notify, usage=usage)
+
+
+def retry_delay(error):
+    """Seconds to wait before the next attempt: the provider's Retry-After when given, else RETRY_DELAY"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        return RETRY_DELAY
+    return min(retry_after, MAX_RETRY_AFTER)
+
+
+def parse_resume_response(llm_response, user_input, notify=None, complete_missing=True, usage=None):
+    """Parse an LLM response, repairing truncated JSON instead of discarding it.
+
+    Returns (resume_data, missing_sections). When the response was cut off, a
+    small follow-up request asks for only the missing sections. `usage` is the
+    answering call's usage dict, whose response format the outcome is counted under.
+    """
+    notify = notify or streamlit_notify
+    usage = usage or {}
+    try:
+        with timed("parse", strategy="scan") as labels:
+            resume_data = parse_json_response(llm_response)
+            labels["outcome"] = "ok"
+        record_parse_outcome("clean", usage)
+        return resume_data, []
+    except ValueError:
         pass
-    
-    # Third try: Find JSON object using regex
-    json_patterns = [
-        r'```json\s*(\{.*?\})\s*```',
-        r'```\s*(\{.*?\})\s*```',
-        r'(\{[^{}]*\{[^{}]*\}[^{}]*\})',
-        r'(\{.*\})',
-    ]
-    
-    for pattern in json_patterns:
-        matches = re.finditer(pattern, response_text, re.DOTALL)
-        for match in matches:
+
+    with timed("parse", strategy="repair") as labels:
+        resume_data, missing = repair_resume_json(llm_response)
+        labels["outcome"] = "ok" if resume_data is not None else "failed"
+    if resume_data is None:
+        # Nothing salvageable: report it the usual way and let the caller retry
+        record_parse_outcome("failed", usage)
+        return extract_json_from_response(llm_response, notify), []
+
+    record_parse_outcome("repaired", usage)
+
+    notify("warning", f"✂️ Response was cut off - recovered {len(resume_data)} sections, missing: {', '.join(missing) or 'none'}")
+    if not missing or not complete_missing:
+        return resume_data, missing
+
+    try:
+        notify("info", f"🧩 Requesting only the missing sections: {', '.join(missing)}...")
+        with timed("parse", strategy="continuation") as labels:
+            prompt = ResumeTemplates.get_continuation_prompt(user_input, resume_data, missing)
+            _merge_continuation(resume_data, missing, get_async_runtime().call_llm_api(prompt, notify=notify))
+            labels["outcome"] = "ok"
+    except Exception as e:
+        notify("warning", f"⚠️ Could not fetch missing sections, keeping the partial resume: {str(e)[:100]}")
+
+    return resume_data, missing
+
+
+async def parse_resume_response_async(llm_response, user_input, clients, notify, usage=None):
+    """parse_resume_response for the event loop: the follow-up request for missing sections is awaited"""
+    resume_data, missing = parse_resume_response(llm_response, user_input, notify, complete_missing=False, usage=usage)
+    if not missing:
+        return resume_data, missing
+
+    try:
+        notify("info", f"🧩 Requesting only the missing sections: {', '.join(missing)}...")
+        with timed("parse", strategy="continuation") as labels:
+            prompt = ResumeTemplates.get_continuation_prompt(user_input, resume_data, missing)
+            _merge_continuation(resume_data, missing, await call_llm_api_async(prompt, clients, notify=notify))
+            labels["outcome"] = "ok"
+    except Exception as e:
+        notify("warning", f"⚠️ Could not fetch missing sections, keeping the partial resume: {str(e)[:100]}")
+
+    return resume_data, missing
+
+
+def _merge_continuation(resume_data, missing, response_text):
+    """Copy the sections a continuation response supplied into resume_data, removing them from `missing`"""
+    continuation, _ = repair_resume_json(response_text)
+    for key in list(missing):
+        if continuation and continuation.get(key):
+            resume_data[key] = continuation[key]
+            missing.remove(key)
+
+
+async def _generate_section_group(user_input, sections, clients, notify, max_retries):
+    """Generate one group of sections, retrying only this group when it fails"""
+    label = " + ".join(sections)
+    prompt = ResumeTemplates.get_section_prompt(user_input, sections)
+
+    def group_notify(level, message):
+        notify(level, f"[{label}] {message}")
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            usage = {}
+            response_text = await call_llm_api_async(prompt, clients, notify=group_notify, usage=usage)
             try:
-                json_str = match.group(1) if match.lastindex else match.group(0)
-                json_str = json_str.strip()
-                parsed = json.loads(json_str)
-                if isinstance(parsed, dict) and 'contact' in parsed:
-                    return parsed
-            except (json.JSONDecodeError, IndexError):
-                continue
-    
-    # Fourth try: Extract largest JSON-like structure
+                data = parse_json_response(response_text)
+            except ValueError:
+                record_parse_outcome("failed", usage)
+                raise
+            absent = [key for key in sections if key not in data]
+            if absent:
+                record_parse_outcome("failed", usage)
+                raise ValueError(f"Response is missing {', '.join(absent)}")
+            record_parse_outcome("clean", usage)
+
+            for key in sections:
+                notify("section", (key, data[key]))
+            return {key: data[key] for key in sections}
+
+        except Exception as e:
+            if attempt == max_retries or isinstance(e, (ProvidersUnavailableError, DeadlineExceededError)):
+                raise
+            delay = retry_delay(e)
+            check_deadline(delay + MIN_ATTEMPT_SECONDS)
+            group_notify("warning", f"⚠️ Attempt {attempt} failed. Retrying this section in {delay:.0f}s...")
+            with timed("retry_wait", mode="sections"):
+                await asyncio.sleep(delay)
+
+
+async def generate_resume_sections_async(user_input, clients, notify, max_retries=MAX_RETRIES):
+    """Run every section group concurrently and merge them into one resume_data dict.
+
+    Returns (resume_data, missing_sections); only raises when the contact and
+    summary group itself could not be generated.
+    """
+    groups = ResumeTemplates.SECTION_GROUPS
+    results = await asyncio.gather(
+        *(_generate_section_group(user_input, sections, clients, notify, max_retries) for sections in groups),
+        return_exceptions=True
+    )
+
+    merged = {}
+    missing = []
+    for sections, result in zip(groups, results):
+        if isinstance(result, Exception):
+            if "contact" in sections:
+                raise result
+            notify("warning", f"⚠️ Could not generate {', '.join(sections)}: {str(result)[:100]}")
+            missing.extend(sections)
+        else:
+            merged.update(result)
+
+    return {key: merged[key] for key in RESUME_SECTIONS if key in merged}, missing
+
+
+# Modes whose LLM calls run on the shared event loop; stream and hedged use the sync clients
+ASYNC_MODES = ("sequential", "sections")
+
+
+def generate_resume_data(user_input, mode="sequential", notify=None, max_retries=MAX_RETRIES, on_section=None):
+    """Build the prompt, call the LLM with retries and return (resume_data, missing_sections).
+
+    Everything runs within GENERATION_DEADLINE (or an enclosing, shorter deadline):
+    HTTP timeouts shrink as it is spent, providers without time to answer are
+    skipped and DeadlineExceededError is raised once it is gone. Async modes
+    block this thread only while relaying their messages back to it.
+    """
+    notify = notify or streamlit_notify
+    if mode in ASYNC_MODES:
+        def dispatch(level, message):
+            # Finished sections travel through the same relay as status messages
+            if level == "section":
+                if on_section is not None:
+                    on_section(*message)
+            else:
+                notify(level, message)
+
+        return get_async_runtime().run(
+            lambda relay: generate_resume_data_async(
+                user_input, mode, relay, max_retries, lambda key, value: relay("section", (key, value))
+            ),
+            dispatch
+        )
+
+    with deadline(GENERATION_DEADLINE):
+        _ensure_providers_available(notify)
+        with timed("prompt_build"):
+            prompt = ResumeTemplates.get_prompt_variants(user_input)
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                usage = {}
+                llm_response = request_resume_text(prompt, mode, notify, on_section, usage)
+                return parse_resume_response(llm_response, user_input, notify, usage=usage)
+            except Exception as e:
+                delay = _next_retry_delay(e, attempt, max_retries, notify)
+                with timed("retry_wait", mode=mode):
+                    time.sleep(delay)
+
+
+async def generate_resume_data_async(user_input, mode="sequential", notify=None, max_retries=MAX_RETRIES,
+                                     on_section=None):
+    """generate_resume_data for the async modes, as a coroutine on the shared event loop.
+
+    notify and on_section are called on the loop thread, so they must be thread-safe.
+    """
+    notify = notify or log_notify
+    clients = get_async_runtime().clients
+    with deadline(GENERATION_DEADLINE):
+        _ensure_providers_available(notify)
+
+        if mode == "sections":
+            def dispatch(level, message):
+                if level != "section":
+                    notify(level, message)
+                elif on_section is not None:
+                    on_section(*message)
+
+            # Each section group retries on its own
+            with timed("llm_call", mode="sections") as labels:
+                result = await generate_resume_sections_async(user_input, clients, dispatch, max_retries)
+                labels["outcome"] = "ok"
+            return result
+
+        with timed("prompt_build"):
+            prompt = ResumeTemplates.get_prompt_variants(user_input)
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                usage = {}
+                with timed("llm_call", mode=mode) as labels:
+                    llm_response = await call_llm_api_async(prompt, clients, notify=notify, usage=usage)
+                    labels["outcome"] = "ok"
+                return await parse_resume_response_async(llm_response, user_input, clients, notify, usage)
+            except Exception as e:
+                delay = _next_retry_delay(e, attempt, max_retries, notify)
+                with timed("retry_wait", mode=mode):
+                    await asyncio.sleep(delay)
+
+
+def _ensure_providers_available(notify):
     try:
-        start = response_text.find('{')
-        end = response_text.rfind('}')
-        if start != -1 and end != -1 and end > start:
-            json_str = response_text[start:end+1]
-            parsed = json.loads(json_str)
-            if isinstance(parsed, dict):
-                return parsed
-    except json.JSONDecodeError:
-        pass
-    
-    st.error("🔍 DEBUG: Could not parse JSON. Response preview:")
-    st.code(response_text[:500] + "..." if len(response_text) > 500 else response_text)
-    
-    raise ValueError("Could not extract valid JSON from response. The AI may have returned malformed data.")
+        # Known-bad providers fail here in microseconds instead of after every timeout and retry
+        ensure_providers_available()
+    except ProvidersUnavailableError as e:
+        notify("error", f"❌ {e}")
+        raise
+
+
+def _next_retry_delay(error, attempt, max_retries, notify):
+    """Seconds to wait before retrying after `error`; re-raises it when another attempt can't help"""
+    if isinstance(error, (ProvidersUnavailableError, DeadlineExceededError)):
+        # No provider is up, or there is no time left
+        notify("error", f"❌ {error}")
+        raise error
+    if attempt == max_retries:
+        notify("error", f"❌ All {max_retries} attempts failed: {str(error)}")
+        raise error
+
+    delay = retry_delay(error)
+    try:
+        check_deadline(delay + MIN_ATTEMPT_SECONDS)
+    except DeadlineExceededError:
+        notify("error", f"❌ No time left for another attempt after: {str(error)}")
+        raise
+    notify("warning", f"⚠️ Attempt {attempt} failed. Retrying in {delay:.0f}s...")
+    return delay
+
+
+def generate_resume_data_shared(user_input, mode="sequential", notify=None, max_retries=MAX_RETRIES, on_section=None):
+    """generate_resume_data, except concurrent calls for the same description share one upstream generation.
+
+    Callers that join an in-flight generation get its result (or error) but
+    not its progress messages or streamed sections.
+    """
+    notify = notify or streamlit_notify
+    return get_generation_flight().do(
+        resume_cache_key(user_input),
+        lambda: generate_resume_data(user_input, mode, notify, max_retries, on_section),
+        on_join=lambda: notify("info", "🤝 This description is already being generated - sharing that result")
+    )
+
+
+def generate_resume_data_future(user_input, mode="sequential", notify=None, max_retries=MAX_RETRIES, on_section=None):
+    """Start an async-mode generation on the shared event loop and return a Future of its result.
+
+    No thread waits for the LLM; like generate_resume_data_shared, identical
+    descriptions in flight share one generation.
+    """
+    notify = notify or log_notify
+    return get_generation_flight().submit(
+        resume_cache_key(user_input),
+        lambda: get_async_runtime().submit(generate_resume_data_async(user_input, mode, notify, max_retries, on_section)),
+        on_join=lambda: notify("info", "🤝 This description is already being generated - sharing that result")
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_fallback_resume(user_name):
+    """HTML for the fallback template; Streamlit's per-key lock makes concurrent builds for one name run once"""
+    return generate_html_resume(ResumeTemplates.get_fallback_template(user_name))
+
+
+# -----------------------------
+# GENERATION JOBS
+# -----------------------------
+
+# Threads are cheap next to LLM latency: async-mode jobs hold one only for the cache lookup and
+# rendering, but streaming and race-mode jobs hold one for the whole call, so this bounds them
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "32"))
+# Finished jobs stay retrievable (e.g. after a browser refresh) for this many seconds
+JOB_TTL = int(os.environ.get("JOB_TTL", str(60 * 60)))
+JOB_POLL_INTERVAL = 1.0
+
+
+class GenerationJob:
+    """One background generation: progress messages, streamed sections and the rendered result"""
+
+    def __init__(self, job_id, user_input, mode="sequential", use_cache=True):
+        self.id = job_id
+        self.user_input = user_input
+        self.mode = mode
+        self.use_cache = use_cache
+        self.status = "queued"  # queued -> running -> done | failed
+        self.created = self.updated = time.time()
+        self.started = None
+        self.messages = []
+        self.sections = {}
+        # (stage, seconds, labels) for every timed step of this generation
+        self.timings = []
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+        # Filled in when the job finishes
+        self.error = None
+        self.cache_hit = False
+        self.resume = None
+        self.resume_data = None
+        self.missing = []
+        self.issues = []
+        self.layout = DEFAULT_LAYOUT
+        self.html_content = None
+        self.pdf_content = None
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    def notify(self, level, message):
+        """notify() for the pipeline: keep the message for whichever session is watching"""
+        log_notify(level, f"[job {self.id}] {message}")
+        with self.lock:
+            self.messages.append((level, message))
+            self.updated = time.time()
+
+    def add_section(self, key, value):
+        with self.lock:
+            self.sections[key] = value
+            self.updated = time.time()
+
+    def progress(self):
+        """Consistent copy of (status, messages, sections) for rendering"""
+        with self.lock:
+            return self.status, list(self.messages), dict(self.sections)
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _finish(self, status):
+        with self.lock:
+            self.status = status
+            self.updated = time.time()
+        self.done.set()
+
+
+class JobQueue:
+    """Worker pool shared by every session, with an in-memory store of jobs by id.
+
+    Generations run here instead of inside a script run, so a rerun or a dropped
+    connection no longer abandons (and re-bills) an LLM call in flight. In the
+    async modes a worker only does the cache lookup and the rendering; the LLM
+    calls wait on the shared event loop without holding a thread.
+    """
+
+    def __init__(self, resume_cache, workers=JOB_WORKERS, ttl=JOB_TTL):
+        self.resume_cache = resume_cache
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generation")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, user_input, mode="sequential", use_cache=True):
+        """Queue a generation and return its GenerationJob"""
+        job = GenerationJob(uuid.uuid4().hex, user_input, mode, use_cache)
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        """Return the job with this id, or None when it is unknown or expired"""
+        if not job_id:
+            return None
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished and job.updated < cutoff]:
+            del self.jobs[job_id]
+
+    def _run(self, job):
+        with job.lock:
+            job.status = "running"
+            job.started = time.time()
+        # Pool threads keep their context between jobs, so the token is always reset
+        token = current_timings.set(job.timings)
+        get_latency_recorder().observe("queue_wait", job.started - job.created)
+        try:
+            # The budget starts when a worker picks the job up; queueing shows up as queue_wait instead
+            with deadline(GENERATION_DEADLINE):
+                self._start(job)
+        except Exception as e:
+            self._finish(job, e)
+        finally:
+            current_timings.reset(token)
+
+    def _start(self, job):
+        resume_data = self.resume_cache.get(resume_cache_key(job.user_input)) if job.use_cache else None
+        job.cache_hit = resume_data is not None
+
+        if job.cache_hit:
+            job.notify("success", "⚡ Loaded from cache - this description was generated recently, no AI call needed")
+            self._complete(job, resume_data)
+            return
+
+        job.notify("info", "🤖 Generating ATS-optimized resume with industry keywords...")
+        if job.mode in ASYNC_MODES:
+            # The LLM calls run on the event loop; this thread goes back to the pool until they finish
+            future = generate_resume_data_future(job.user_input, job.mode, job.notify, on_section=job.add_section)
+            context = contextvars.copy_context()
+
+            def collect(done):
+                try:
+                    self.executor.submit(context.run, self._collect, job, done)
+                except RuntimeError:
+                    # The queue was closed while the generation was in flight
+                    pass
+
+            future.add_done_callback(collect)
+            return
+
+        future = Future()
+        try:
+            future.set_result(generate_resume_data_shared(job.user_input, job.mode, job.notify, on_section=job.add_section))
+        except Exception as e:
+            future.set_exception(e)
+        self._collect(job, future)
+
+    def _collect(self, job, future):
+        """Finish a job from its generation's outcome"""
+        try:
+            try:
+                resume_data, job.missing = future.result()
+            except LLMProviderError:
+                # With the providers down, a recent result for this description beats the blank template
+                resume_data = None if job.use_cache else self.resume_cache.get(resume_cache_key(job.user_input))
+                if resume_data is None:
+                    raise
+                job.cache_hit = True
+                job.notify("warning", "♻️ The AI providers are unavailable - showing the recent result for this description")
+            self._complete(job, resume_data)
+        except Exception as e:
+            self._finish(job, e)
+
+    def _complete(self, job, resume_data):
+        # Validate once; everything below works on the typed model
+        with timed("validate"):
+            job.resume, job.issues = validate_resume(resume_data)
+            job.resume_data = job.resume.to_dict()
+
+        # Partial (repaired) resumes are shown but never cached
+        if not job.cache_hit and not job.missing:
+            self.resume_cache.set(resume_cache_key(job.user_input), job.resume_data)
+
+        with timed("fit_layout"):
+            job.layout, _ = fit_to_one_page(job.resume)
+        with timed("render_html"):
+            job.html_content = generate_html_resume(job.resume, job.layout)
+        with timed("render_pdf"):
+            job.pdf_content = render_resume_pdf(job.html_content, job.notify)
+        self._finish(job)
+
+    def _finish(self, job, error=None):
+        """Record the job's total time and mark it done, or failed with `error`"""
+        outcome = "error" if error is not None else "cache_hit" if job.cache_hit else "ok"
+        get_latency_recorder().observe("generation", time.time() - job.started, mode=job.mode, outcome=outcome)
+        if error is not None:
+            logger.error("Generation job %s failed: %s", job.id, error, exc_info=error)
+            job.error = str(error)
+            job._finish("failed")
+        else:
+            job._finish("done")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue():
+    """Process-wide generation job queue shared by every session"""
+    return JobQueue(get_resume_cache())
 
 
 # -----------------------------
 # STREAMLIT UI
 # -----------------------------
 
+GENERATION_MODES = {
+    "⚡ Stream sections live": "stream",
+    "🏁 Race providers (hedged)": "hedged",
+    "🔁 Sequential failover": "sequential",
+    "🧩 Parallel sections": "sections"
+}
+
+# Static sidebar help, sent as one element instead of nine separate markdown calls per rerun
+SIDEBAR_GUIDE = """
+---
+### 🎯 ATS Optimization Features
+- ✨ **AI-Powered Generation**
+- 📊 **Keyword-Rich Content**
+- 💼 **Achievement-Focused**
+- 📈 **Quantifiable Metrics**
+- 🔑 **Industry Keywords**
+- 📄 **ATS-Friendly Format**
+- 💾 **Instant Download**
+
+---
+### 💡 Pro Tips for Better Results
+**Include in your description:**
+- Your target role/title
+- Years of experience
+- Key technical skills
+- Industry/domain
+- Career goals
+
+**Example:**
+"Software engineer with 3 years experience in Python and React, specializing in web applications, seeking senior developer role"
+
+---
+### 🔑 What Makes a Great Resume
+- **Keywords**: Industry-specific terms
+- **Metrics**: Numbers, %, $ amounts
+- **Action Verbs**: Developed, engineered, optimized
+- **Impact**: Show results, not just duties
+- **ATS Format**: Standard sections, no graphics
+"""
+
+STREAMED_SECTION_LABELS = {
+    "education": "🎓 Education",
+    "experience": "💼 Experience",
+    "projects": "🛠️ Projects",
+    "certifications": "📜 Certifications",
+    "achievements": "🏆 Achievements"
+}
+
+
+def render_streamed_section(container, key, value):
+    """Render one completed resume section while the rest is still streaming"""
+    if key == "contact" and isinstance(value, dict):
+        details = [value.get(field) for field in ("email", "phone", "location") if value.get(field)]
+        container.markdown(f"**👤 {value.get('name', 'Your Name')}** — {' | '.join(details)}")
+    elif key == "professional_summary" and isinstance(value, str):
+        container.markdown("**📋 Professional Summary:**")
+        container.info(value)
+    elif key == "technical_skills" and isinstance(value, dict):
+        container.markdown("**🔑 Technical Skills:**")
+        for category, skills in value.items():
+            if isinstance(skills, list):
+                skills = ", ".join(str(skill) for skill in skills)
+            container.markdown(f"- **{category}:** {skills}")
+    elif key in STREAMED_SECTION_LABELS:
+        count = len(value) if isinstance(value, list) else 1
+        container.success(f"✓ {STREAMED_SECTION_LABELS[key]} ready ({count})")
+
+
+def configure_page():
+    """Set page config and inject the app's custom CSS (must run before any other st call)"""
+    st.set_page_config(
+        page_title="AI Resume Builder",
+        page_icon="📄",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_job_progress(job_id):
+    """Poll a running job, showing its messages and streamed sections; rerun the app once it finishes"""
+    job = get_job_queue().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+
+    _, messages, sections = job.progress()
+    elapsed = time.time() - job.created
+    st.warning(f"⏳ Generating ({elapsed:.0f}s) - this may take 30-60 seconds for best quality...")
+    for level, message in messages:
+        streamlit_notify(level, message)
+    for key, value in sections.items():
+        render_streamed_section(st, key, value)
+
+
+def render_resume_result(job):
+    """Show a finished job's resume with its downloads and preview; safe to call on every rerun"""
+    resume = job.resume
+    _, messages, _ = job.progress()
+    for level, message in messages:
+        streamlit_notify(level, message)
+
+    if job.issues:
+        st.warning(f"🧹 Repaired {len(job.issues)} malformed field(s): {'; '.join(job.issues[:3])}")
+
+    # Validate professional summary
+    if len(resume.professional_summary.split()) < 20:
+        st.warning("⚠️ Generated summary is too short. Enhancing...")
+
+    layout_changes = describe_layout(job.layout, resume)
+    if layout_changes:
+        st.info(f"📐 Fitted to one page: {', '.join(layout_changes)}")
+
+    # Named after the job's start time, so reruns offer the same file names
+    filename = f"resume_ats_optimized_{datetime.fromtimestamp(job.created).strftime('%Y%m%d_%H%M%S')}.html"
+
+    # Success message
+    st.markdown("""
+        <div class="success-box">
+            <h2>✅ ATS-Optimized Resume Generated Successfully!</h2>
+            <p>Your keyword-rich, professionally formatted resume is ready</p>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Display key features
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.info("✅ **Keyword Optimized**\nIndustry-relevant terms included")
+    with col2:
+        st.info("✅ **Achievement Focused**\nMetrics and impact highlighted")
+    with col3:
+        st.info("✅ **ATS Compatible**\nStandard format for parsing")
+
+    st.success(f"📄 Saved as: {filename}")
+
+    # Save JSON backup
+    json_filename = filename.replace('.html', '.json')
+
+    html_content = job.html_content
+    pdf_content = job.pdf_content
+
+    # Download buttons
+    if pdf_content:
+        col1, col2, col3 = st.columns(3)
+        with col3:
+            st.download_button(
+                label="📕 Download PDF Resume",
+                data=pdf_content,
+                file_name=filename.replace('.html', '.pdf'),
+                mime="application/pdf",
+                use_container_width=True
+            )
+    else:
+        col1, col2 = st.columns(2)
+
+    with col1:
+        st.download_button(
+            label="📄 Download HTML Resume",
+            data=html_content,
+            file_name=filename,
+            mime="text/html",
+            use_container_width=True
+        )
+
+    with col2:
+        with timed("download_prep"):
+            json_data = json.dumps(job.resume_data, indent=2)
+        st.download_button(
+            label="💾 Download Resume Data (JSON)",
+            data=json_data,
+            file_name=json_filename,
+            mime="application/json",
+            use_container_width=True
+        )
+
+    if not pdf_content:
+        st.info("💡 **To save as PDF:** Open the HTML file in your browser and use Print → Save as PDF (Ctrl+P / Cmd+P)")
+
+    # Show ATS tips
+    st.markdown("""
+        <div class="info-card">
+            <strong>🎯 ATS Optimization Tips Applied:</strong><br>
+            ✓ Industry-specific keywords naturally integrated<br>
+            ✓ Achievement-based bullets with quantifiable metrics<br>
+            ✓ Standard section headers for ATS parsing<br>
+            ✓ Action verbs at the start of each bullet<br>
+            ✓ Technical skills organized by category<br>
+            ✓ Clean, parseable formatting without graphics
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Preview
+    st.markdown("### 👀 Resume Preview")
+    st.markdown("**📋 Professional Summary:**")
+    st.info(resume.professional_summary or 'N/A')
+    
+    st.markdown("**🔑 Key Highlights:**")
+    highlights = []
+    if resume.technical_skills:
+        skills_count = sum(len(v) for v in resume.technical_skills.values())
+        highlights.append(f"✓ {skills_count} technical skills listed")
+    if resume.experience:
+        exp_count = sum(len(exp.achievements) for exp in resume.experience)
+        highlights.append(f"✓ {exp_count} achievement-focused bullets")
+    if resume.projects:
+        highlights.append(f"✓ {len(resume.projects)} projects showcased")
+    if resume.certifications:
+        highlights.append(f"✓ {len(resume.certifications)} certifications")
+    
+    for highlight in highlights:
+        st.success(highlight)
+
+    st.markdown("### 📄 Full Resume")
+    st.components.v1.html(html_content, height=800, scrolling=True)
+
+    render_job_timings(job)
+
+
+def render_job_timings(job):
+    """Debug view of where a generation spent its time"""
+    with job.lock:
+        timings = list(job.timings)
+    if not timings:
+        return
+    with st.expander("⏱️ Stage timings"):
+        for stage, seconds, labels in timings:
+            details = ", ".join(f"{name}={value}" for name, value in labels.items())
+            st.caption(f"**{stage}**{f' ({details})' if details else ''}: {seconds * 1000:.1f} ms")
+
+
+def render_fallback(job):
+    """Offer the fallback template after a failed job"""
+    _, messages, _ = job.progress()
+    for level, message in messages:
+        streamlit_notify(level, message)
+    st.error(f"❌ Error generating resume: {job.error}")
+
+    # Try to extract name for fallback
+    name_match = re.search(r'name is ([A-Za-z\s]+)', job.user_input, re.IGNORECASE)
+    if name_match:
+        user_name = name_match.group(1).strip()
+    else:
+        user_name = "Your Name"
+
+    st.warning(f"💡 Using ATS-optimized fallback template for: {user_name}")
+    st.warning("⚠️  Please customize the generated resume with your actual details!")
+
+    try:
+        # Generate fallback resume (built once per name and shared)
+        st.info("🎨 Creating HTML resume...")
+        html_content = build_fallback_resume(user_name)
+
+        # Save HTML file
+        filename = f"resume_template_{datetime.fromtimestamp(job.created).strftime('%Y%m%d_%H%M%S')}.html"
+
+        st.success(f"✅ ATS-optimized template generated!")
+        st.success(f"📄 Saved as: {filename}")
+        st.info("""💡 IMPORTANT: This is a template. Please edit with your actual:
+   • Personal contact information
+   • Education details and coursework
+   • Work experience and achievements
+   • Projects and technical skills
+   • Certifications and achievements""")
+
+        # Download button
+        st.download_button(
+            label="📄 Download ATS Template",
+            data=html_content,
+            file_name=filename,
+            mime="text/html",
+            use_container_width=True
+        )
+
+        # Preview
+        st.markdown("### 👀 Template Preview")
+        st.components.v1.html(html_content, height=800, scrolling=True)
+
+        render_job_timings(job)
+
+    except Exception as fallback_error:
+        st.error(f"❌ Could not generate fallback template: {str(fallback_error)}")
+
+
 def main():
+    configure_page()
+
     # Title
     st.markdown("""
         <div class="title-container">
@@ -1222,42 +4324,62 @@ def main():
     # Sidebar
     with st.sidebar:
         st.markdown("### ⚙️ Settings")
-        st.markdown("---")
-        
-        st.markdown("### 🎯 ATS Optimization Features")
-        st.markdown("""
-        - ✨ **AI-Powered Generation**
-        - 📊 **Keyword-Rich Content**
-        - 💼 **Achievement-Focused**
-        - 📈 **Quantifiable Metrics**
-        - 🔑 **Industry Keywords**
-        - 📄 **ATS-Friendly Format**
-        - 💾 **Instant Download**
-        """)
-
-        st.markdown("---")
-        st.markdown("### 💡 Pro Tips for Better Results")
-        st.markdown("""
-        **Include in your description:**
-        - Your target role/title
-        - Years of experience
-        - Key technical skills
-        - Industry/domain
-        - Career goals
-        
-        **Example:**
-        "Software engineer with 3 years experience in Python and React, specializing in web applications, seeking senior developer role"
-        """)
-        
-        st.markdown("---")
-        st.markdown("### 🔑 What Makes a Great Resume")
-        st.markdown("""
-        - **Keywords**: Industry-specific terms
-        - **Metrics**: Numbers, %, $ amounts
-        - **Action Verbs**: Developed, engineered, optimized
-        - **Impact**: Show results, not just duties
-        - **ATS Format**: Standard sections, no graphics
-        """)
+        generation_mode = st.radio(
+            "Generation mode",
+            list(GENERATION_MODES),
+            help="Stream: preview each section as soon as it is complete. "
+                 "Race: start a backup provider if the first one is slow and keep the fastest valid answer. "
+                 "Parallel: request each section separately at the same time and retry only the ones that fail."
+        )
+        generation_mode = GENERATION_MODES[generation_mode]
+        use_cache = st.checkbox(
+            "♻️ Reuse recent results",
+            value=True,
+            help="Serve identical descriptions from the response cache instead of calling the AI again"
+        )
+        resume_cache = get_resume_cache()
+        st.caption(
+            f"Cache: {resume_cache.hits} hits / {resume_cache.misses} misses, "
+            f"{get_generation_flight().coalesced} coalesced"
+        )
+
+        parse_counts = get_parse_stats().snapshot()
+        if parse_counts:
+            with st.expander("📈 Parse outcomes"):
+                for response_format, counts in parse_counts.items():
+                    st.caption(
+                        f"**{response_format}**: {counts['clean']} clean, {counts['repaired']} repaired, "
+                        f"{counts['failed']} failed (retried)"
+                    )
+
+        token_totals = get_token_meter().snapshot()
+        if token_totals:
+            with st.expander("🔢 Token usage"):
+                for provider_name, totals in token_totals.items():
+                    average_prompt = totals["prompt_tokens"] // totals["requests"]
+                    st.caption(
+                        f"**{provider_name}** ({provider_prompt_style(provider_name)} prompt): "
+                        f"{totals['requests']} calls, {totals['prompt_tokens']} prompt "
+                        f"(avg {average_prompt}) + {totals['completion_tokens']} completion tokens"
+                    )
+        latency = get_latency_recorder().snapshot()
+        if latency:
+            with st.expander("⏱️ Latency"):
+                for stage, labels, count, total in latency:
+                    details = ", ".join(f"{name}={value}" for name, value in labels.items())
+                    st.caption(f"**{stage}**{f' ({details})' if details else ''}: {count} × {total / count * 1000:.1f} ms avg")
+        routing = get_provider_router().snapshot()
+        if routing:
+            with st.expander("🧭 Provider routing"):
+                for (provider_name, model), stats in routing.items():
+                    throughput = f"{stats['tokens_per_second']:.0f} tok/s" if stats["tokens_per_second"] else "n/a"
+                    circuit = f"open, probing in {stats['probe_in']:.0f}s" if stats["circuit_open"] else "closed"
+                    st.caption(
+                        f"**{provider_name}** ({model}): ~{stats['expected_seconds']:.1f}s expected, {throughput}, "
+                        f"{stats['error_rate']:.0%} errors, circuit {circuit}"
+                    )
+
+        st.markdown(SIDEBAR_GUIDE)
 
     # Main content
     col1, col2, col3 = st.columns(3)
@@ -1316,7 +4438,8 @@ def main():
     with col2:
         generate_button = st.button("🚀 Generate My ATS-Optimized Resume", use_container_width=True)
 
-    # Generation logic
+    # Generation runs in the shared job queue; the job id survives reruns, and the URL keeps it across reconnects
+    job_queue = get_job_queue()
     if generate_button:
         if not user_input:
             st.error("❌ Please provide a description to generate your resume.")
@@ -1325,181 +4448,30 @@ def main():
         if len(user_input.split()) < 10:
             st.warning("⚠️ For best results, provide more details (at least 10 words). Include your role, experience, skills, and goals.")
 
-        st.info(f"🤖 Generating ATS-optimized resume with industry keywords...")
-        st.warning("⏳ This may take 30-60 seconds for best quality...")
-
-        try:
-            enhanced_prompt = ResumeTemplates.get_enhanced_prompt(user_input)
-
-            # Call LLM API with retry logic
-            MAX_RETRIES = 3
-            retry_count = 0
-            resume_data = None
-
-            while retry_count < MAX_RETRIES and resume_data is None:
-                try:
-                    with st.spinner(f"🎯 Attempt {retry_count + 1}/{MAX_RETRIES}: Generating resume..."):
-                        llm_response = call_llm_api(enhanced_prompt)
-                        st.info("📊 Parsing resume data...")
-                        resume_data = extract_json_from_response(llm_response)
-                        break  # Success!
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count < MAX_RETRIES:
-                        st.warning(f"⚠️ Attempt {retry_count} failed. Retrying...")
-                        import time
-                        time.sleep(2)
-                    else:
-                        st.error(f"❌ All {MAX_RETRIES} attempts failed: {str(e)}")
-                        raise
-            
-            if resume_data is None:
-                raise Exception("Failed to generate valid resume data after all retries")
-
-            # Validate professional summary
-            summary = resume_data.get('professional_summary', '')
-            if len(summary.split()) < 20:
-                st.warning("⚠️ Generated summary is too short. Enhancing...")
-
-            # Generate HTML resume
-            st.info("🎨 Creating ATS-friendly HTML resume...")
-            html_content = generate_html_resume(resume_data)
-
-            # Save HTML file
-            filename = f"resume_ats_optimized_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-
-            # Success message
-            st.markdown("""
-                <div class="success-box">
-                    <h2>✅ ATS-Optimized Resume Generated Successfully!</h2>
-                    <p>Your keyword-rich, professionally formatted resume is ready</p>
-                </div>
-            """, unsafe_allow_html=True)
-
-            # Display key features
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.info("✅ **Keyword Optimized**\nIndustry-relevant terms included")
-            with col2:
-                st.info("✅ **Achievement Focused**\nMetrics and impact highlighted")
-            with col3:
-                st.info("✅ **ATS Compatible**\nStandard format for parsing")
-
-            st.success(f"📄 Saved as: {filename}")
-
-            # Save JSON backup
-            json_filename = filename.replace('.html', '.json')
-
-            # Download buttons
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.download_button(
-                    label="📄 Download HTML Resume",
-                    data=html_content,
-                    file_name=filename,
-                    mime="text/html",
-                    use_container_width=True
-                )
-
-            with col2:
-                json_data = json.dumps(resume_data, indent=2)
-                st.download_button(
-                    label="💾 Download Resume Data (JSON)",
-                    data=json_data,
-                    file_name=json_filename,
-                    mime="application/json",
-                    use_container_width=True
-                )
-
-            st.info("💡 **To save as PDF:** Open the HTML file in your browser and use Print → Save as PDF (Ctrl+P / Cmd+P)")
-
-            # Show ATS tips
-            st.markdown("""
-                <div class="info-card">
-                    <strong>🎯 ATS Optimization Tips Applied:</strong><br>
-                    ✓ Industry-specific keywords naturally integrated<br>
-                    ✓ Achievement-based bullets with quantifiable metrics<br>
-                    ✓ Standard section headers for ATS parsing<br>
-                    ✓ Action verbs at the start of each bullet<br>
-                    ✓ Technical skills organized by category<br>
-                    ✓ Clean, parseable formatting without graphics
-                </div>
-            """, unsafe_allow_html=True)
-
-            # Preview
-            st.markdown("### 👀 Resume Preview")
-            st.markdown("**📋 Professional Summary:**")
-            st.info(resume_data.get('professional_summary', 'N/A'))
-            
-            st.markdown("**🔑 Key Highlights:**")
-            highlights = []
-            if resume_data.get('technical_skills'):
-                skills_count = sum(len(v) for v in resume_data['technical_skills'].values())
-                highlights.append(f"✓ {skills_count} technical skills listed")
-            if resume_data.get('experience'):
-                exp_count = sum(len(exp.get('achievements', [])) for exp in resume_data['experience'])
-                highlights.append(f"✓ {exp_count} achievement-focused bullets")
-            if resume_data.get('projects'):
-                highlights.append(f"✓ {len(resume_data['projects'])} projects showcased")
-            if resume_data.get('certifications'):
-                highlights.append(f"✓ {len(resume_data['certifications'])} certifications")
-            
-            for highlight in highlights:
-                st.success(highlight)
-
-            st.markdown("### 📄 Full Resume")
-            st.components.v1.html(html_content, height=800, scrolling=True)
-
-        except Exception as e:
-            st.error(f"❌ Error generating resume: {str(e)}")
-
-            # Try to extract name for fallback
-            name_match = re.search(r'name is ([A-Za-z\s]+)', user_input, re.IGNORECASE)
-            if name_match:
-                user_name = name_match.group(1).strip()
-            else:
-                user_name = "Your Name"
-
-            st.warning(f"💡 Using ATS-optimized fallback template for: {user_name}")
-            st.warning("⚠️  Please customize the generated resume with your actual details!")
-
-            try:
-                # Generate fallback resume
-                resume_data = ResumeTemplates.get_fallback_template(user_name)
-
-                # Generate HTML resume
-                st.info("🎨 Creating HTML resume...")
-                html_content = generate_html_resume(resume_data)
-
-                # Save HTML file
-                filename = f"resume_template_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-
-                st.success(f"✅ ATS-optimized template generated!")
-                st.success(f"📄 Saved as: {filename}")
-                st.info("""💡 IMPORTANT: This is a template. Please edit with your actual:
-   • Personal contact information
-   • Education details and coursework
-   • Work experience and achievements
-   • Projects and technical skills
-   • Certifications and achievements""")
-
-                # Download button
-                st.download_button(
-                    label="📄 Download ATS Template",
-                    data=html_content,
-                    file_name=filename,
-                    mime="text/html",
-                    use_container_width=True
-                )
-
-                # Preview
-                st.markdown("### 👀 Template Preview")
-                st.components.v1.html(html_content, height=800, scrolling=True)
-
-            except Exception as fallback_error:
-                st.error(f"❌ Could not generate fallback template: {str(fallback_error)}")
-
+        job = job_queue.submit(user_input, generation_mode, use_cache)
+        st.session_state.job_id = job.id
+        st.query_params["job"] = job.id
+        # Cache hits finish almost immediately; don't make them wait for the first poll
+        job.wait(JOB_POLL_INTERVAL)
+
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if not job_id:
+        return
+
+    job = job_queue.get(job_id)
+    if job is None:
+        st.info("⌛ That resume is no longer available. Please generate it again.")
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        return
+
+    st.session_state.job_id = job.id
+    if not job.finished:
+        render_job_progress(job.id)
+    elif job.error:
+        render_fallback(job)
+    else:
+        render_resume_result(job)
 
 if __name__ == "__main__":
     main()
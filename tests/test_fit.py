@@ -0,0 +1,44 @@
+"""One-page fit: every item is shown while it fits, and items are trimmed only as far as needed."""
+
+import copy
+from dataclasses import replace
+
+from mock_llm_server import SAMPLE_RESUME
+from streamlit_app import (DEFAULT_LAYOUT, PAGE_CONTENT_HEIGHT_MM, describe_layout, estimate_resume_height,
+                           fit_to_one_page, validate_resume)
+
+
+def resume_with(**changes):
+    data = copy.deepcopy(SAMPLE_RESUME)
+    data.update(changes)
+    return validate_resume(data)[0]
+
+
+def test_default_sized_resume_keeps_default_layout():
+    resume = validate_resume(SAMPLE_RESUME)[0]
+    layout, height = fit_to_one_page(resume)
+    assert layout == DEFAULT_LAYOUT
+    assert height <= PAGE_CONTENT_HEIGHT_MM
+    assert describe_layout(layout, resume) == []
+
+
+def test_extra_items_are_shown_when_they_fit():
+    role = dict(SAMPLE_RESUME["experience"][0], achievements=[f"Shipped feature {i} to production" for i in range(6)])
+    resume = resume_with(experience=[role], projects=[], certifications=[f"Certification {i}" for i in range(5)])
+
+    layout, height = fit_to_one_page(resume)
+    assert layout.role_bullets == 6
+    assert layout.list_items == 5
+    assert height <= PAGE_CONTENT_HEIGHT_MM
+    assert describe_layout(layout, resume) == []
+
+
+def test_extra_items_are_trimmed_only_until_the_page_fits():
+    experience = [dict(role, achievements=role["achievements"] * 3) for role in SAMPLE_RESUME["experience"]]
+    resume = resume_with(experience=experience, certifications=["Certified Kubernetes Administrator (CKA) - CNCF, 2023"] * 8)
+
+    layout, height = fit_to_one_page(resume)
+    assert height <= PAGE_CONTENT_HEIGHT_MM
+    # One more bullet per role would overflow
+    assert estimate_resume_height(resume, replace(layout, role_bullets=layout.role_bullets + 1)) > PAGE_CONTENT_HEIGHT_MM
+    assert describe_layout(layout, resume)
@@ -0,0 +1,44 @@
+"""Industry detection: whole-word triggers, plural job titles and the labelled benchmark corpus.
+
+Run bench_industry_detection.py for timings next to the substring matcher it replaced.
+"""
+
+import pytest
+
+from bench_industry_detection import CORPUS, legacy_get_industry_keywords, misclassified
+from streamlit_app import ATSKeywordExtractor
+
+
+@pytest.mark.parametrize("text, expected", CORPUS)
+def test_corpus(text, expected):
+    assert ATSKeywordExtractor.detect_industry(text) == expected
+
+
+@pytest.mark.parametrize("text, industry", [
+    ("Maintains legacy billing systems", "data_science"),
+    ("Database tuning and backups", "data_science"),
+    ("Database tuning and backups", "business_analyst"),
+    ("Development of internal tools", "product_management"),
+])
+def test_trigger_inside_another_word_does_not_match(text, industry):
+    # "ai" in maintains, "data"/"ba" in database, "pm" in development
+    assert industry not in dict(ATSKeywordExtractor.classify_industry(text))
+
+
+@pytest.mark.parametrize("plural, singular, industry", [
+    ("engineers", "engineer", "software_engineering"),
+    ("developers", "developer", "software_engineering"),
+    ("PMs", "PM", "product_management"),
+    ("data scientists", "data scientist", "data_science"),
+    ("business analysts", "business analyst", "business_analyst"),
+    ("product managers", "product manager", "product_management"),
+])
+def test_plural_scores_like_singular(plural, singular, industry):
+    scores = dict(ATSKeywordExtractor.classify_industry(f"Hiring {plural} in Berlin"))
+    assert ATSKeywordExtractor.detect_industry(f"Hiring {plural} in Berlin") == industry
+    assert scores == dict(ATSKeywordExtractor.classify_industry(f"Hiring {singular} in Berlin"))
+
+
+def test_fixes_every_legacy_miss():
+    assert misclassified(legacy_get_industry_keywords)
+    assert misclassified(ATSKeywordExtractor.get_industry_keywords) == []
@@ -0,0 +1,57 @@
+"""JSON extraction: the response shapes models return, fuzzed variants and pathological inputs.
+
+The pathological cases check that the scanner grows linearly with its input; run
+bench_json_extraction.py for timings next to the regex parser it replaced.
+"""
+
+import json
+
+import pytest
+
+from bench_json_extraction import (PATHOLOGICAL, RESUME_JSON, fuzz_cases, legacy_parse_json_response,
+                                   time_parse, try_parse)
+from mock_llm_server import SAMPLE_RESUME
+from streamlit_app import parse_json_response
+
+RESPONSES = {
+    "plain": RESUME_JSON,
+    "fenced": "```json\n" + RESUME_JSON + "\n```",
+    "prose and fence": "Sure! Here's your resume:\n```json\n" + RESUME_JSON + "\n```\nLet me know {if} you need changes.",
+    "prose brace before": "Use {curly braces wisely. " + RESUME_JSON,
+    "smaller object first": '{"note": 1} then ' + RESUME_JSON,
+    "nested fences": "```\n```json\n" + RESUME_JSON + "\n```\n```",
+}
+
+
+@pytest.mark.parametrize("name", RESPONSES)
+def test_finds_resume(name):
+    assert parse_json_response(RESPONSES[name]) == SAMPLE_RESUME
+
+
+def test_braces_inside_strings():
+    data = {"contact": {"name": "a}b{c"}, "note": "```"}
+    assert parse_json_response("Here you go: " + json.dumps(data)) == data
+
+
+@pytest.mark.parametrize("text", ["", "I cannot do that.", RESUME_JSON[:len(RESUME_JSON) // 2], "{" * 50])
+def test_raises_value_error_without_json(text):
+    with pytest.raises(ValueError):
+        parse_json_response(text)
+
+
+def test_fuzz_finds_every_resume_the_legacy_parser_found():
+    for text in fuzz_cases(1000):
+        legacy = try_parse(legacy_parse_json_response, text)
+        # Only ValueError may escape, whatever the input
+        current = try_parse(parse_json_response, text)
+        if isinstance(legacy, dict) and "contact" in legacy:
+            assert isinstance(current, dict) and "contact" in current, text
+
+
+@pytest.mark.parametrize("name", PATHOLOGICAL)
+def test_pathological_input_scales_linearly(name):
+    build = PATHOLOGICAL[name]
+    small = time_parse(parse_json_response, build(2000))
+    large = time_parse(parse_json_response, build(8000))
+    # 4x the input: linear takes ~4x as long, quadratic ~16x; the constant absorbs timer noise
+    assert large < 8 * small + 0.01, f"{small:.4f}s -> {large:.4f}s"
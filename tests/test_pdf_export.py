@@ -0,0 +1,91 @@
+"""PDF export: availability check, the HTML-hash cache and falling back to HTML when the renderer can't start.
+
+Rendering itself needs WeasyPrint and its Pango system libraries; those tests are
+skipped where they can't be imported.
+"""
+
+import pytest
+
+from pdf_export import PDF_AVAILABLE, PDFExportError, PDFRenderer, html_digest
+from streamlit_app import render_resume_pdf
+
+HTML = "<html><body><h1>Alex Morgan</h1><p>Backend engineer</p></body></html>"
+
+needs_weasyprint = pytest.mark.skipif(not PDF_AVAILABLE, reason="WeasyPrint or its system libraries are missing")
+
+
+@pytest.fixture
+def renderer(monkeypatch, tmp_path):
+    """Build renderers even without WeasyPrint; worker processes only start on the first render that misses the cache"""
+    monkeypatch.setattr("pdf_export.PDF_AVAILABLE", True)
+    renderers = []
+
+    def make(**kwargs):
+        kwargs.setdefault("cache_dir", str(tmp_path))
+        renderers.append(PDFRenderer(workers=1, **kwargs))
+        return renderers[-1]
+
+    yield make
+    for instance in renderers:
+        instance.close()
+
+
+def test_available_only_when_importable():
+    if PDF_AVAILABLE:
+        import weasyprint  # noqa: F401
+    else:
+        with pytest.raises((ImportError, OSError)):
+            import weasyprint  # noqa: F401
+
+
+def test_cache_hit_skips_rendering(renderer):
+    pdf = b"%PDF-1.7 cached"
+    first = renderer()
+    first._store(html_digest(HTML), pdf)
+
+    assert first.render(HTML) == pdf
+    assert (first.hits, first.misses) == (1, 0)
+
+    # A new process finds it in PDF_CACHE_DIR
+    second = renderer()
+    assert second.render(HTML) == pdf
+    assert (second.hits, second.misses) == (1, 0)
+
+
+def test_cache_evicts_least_recently_used(renderer):
+    cache = renderer(cache_dir=None, cache_size=2)
+    for name in ("a", "b", "c"):
+        cache._store(name, name.encode())
+    assert list(cache.cache) == ["b", "c"]
+
+
+def test_broken_renderer_fails_fast_and_falls_back_to_html(renderer, monkeypatch):
+    # A warm-up that raises stops the worker from starting, as missing Pango libraries do
+    broken = renderer(cache_dir=None, style_block=0.5)
+    with pytest.raises(PDFExportError):
+        broken.render(HTML)
+    assert broken.broken
+
+    # Later calls don't wait on the pool again, and the app offers HTML only
+    with pytest.raises(PDFExportError, match="could not start"):
+        broken.render(HTML + "<p>again</p>")
+    monkeypatch.setattr("streamlit_app.get_pdf_renderer", lambda: broken)
+    assert render_resume_pdf(HTML, notify=lambda level, message: None) is None
+
+
+def test_no_renderer_without_weasyprint(monkeypatch):
+    monkeypatch.setattr("streamlit_app.get_pdf_renderer", lambda: None)
+    assert render_resume_pdf(HTML, notify=lambda level, message: None) is None
+
+
+@needs_weasyprint
+def test_renders_through_the_pool_and_caches(tmp_path):
+    renderer = PDFRenderer(workers=2, cache_dir=str(tmp_path))
+    try:
+        documents = [HTML, HTML.replace("Alex", "Sam")]
+        first = renderer.render_many(documents)
+        assert all(pdf.startswith(b"%PDF") for pdf in first)
+        assert renderer.render_many(documents) == first
+        assert (renderer.hits, renderer.misses) == (2, 2)
+    finally:
+        renderer.close()
@@ -0,0 +1,52 @@
+"""Prompt prefix stability: the system message must be byte-identical for every user of an industry.
+
+Providers only reuse a cached prompt prefix when it matches exactly, so anything
+per-request (the user input, timestamps, set ordering) belongs in the user message.
+"""
+
+import pytest
+
+from streamlit_app import INDUSTRY_NAMES, INDUSTRY_TRIGGERS, ATSKeywordExtractor, ResumeTemplates
+
+BUILDERS = {
+    "full": ResumeTemplates.get_enhanced_prompt,
+    "compact": ResumeTemplates.get_compact_prompt,
+    **{
+        "sections:" + "+".join(group): (lambda text, group=group: ResumeTemplates.get_section_prompt(text, group))
+        for group in ResumeTemplates.SECTION_GROUPS
+    }
+}
+
+CACHED_INSTRUCTIONS = (
+    ResumeTemplates.get_enhanced_instructions,
+    ResumeTemplates.get_compact_instructions,
+    ResumeTemplates.get_section_instructions
+)
+
+
+def inputs_for(industry):
+    """Two unrelated descriptions that both detect as `industry`"""
+    trigger = INDUSTRY_TRIGGERS[industry][0]
+    return (
+        f"Priya Raman, {trigger} with 3 years at a fintech startup in Bangalore, priya@example.com",
+        f"Senior {trigger} lead, 12 years, ex-Fortune 500, open to remote roles in Berlin",
+    )
+
+
+@pytest.mark.parametrize("style", BUILDERS)
+@pytest.mark.parametrize("industry", INDUSTRY_NAMES)
+def test_system_prompt_is_identical_across_inputs(industry, style):
+    first, second = inputs_for(industry)
+    assert ATSKeywordExtractor.detect_industry(first) == industry
+    assert ATSKeywordExtractor.detect_industry(second) == industry
+
+    build = BUILDERS[style]
+    prompt_a = build(first)
+    # Rebuild from scratch rather than comparing the same cached string
+    for instructions in CACHED_INSTRUCTIONS:
+        instructions.cache_clear()
+    prompt_b = build(second)
+
+    assert prompt_a.system == prompt_b.system
+    assert prompt_a.user != prompt_b.user
+    assert first not in prompt_a.system and first in prompt_a.user
@@ -0,0 +1,31 @@
+"""Golden-output tests: generate_html_resume must stay byte-identical for these documents.
+
+The expected HTML was produced by the original string-concatenation renderer.
+After an intentional visual change, regenerate a fixture with:
+    python -c "import json, streamlit_app as a; print(a.generate_html_resume(json.load(open('tests/golden/NAME.json'))), end='')" > tests/golden/NAME.html
+"""
+
+import glob
+import json
+import os
+
+import pytest
+
+from streamlit_app import generate_html_resume
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+CASES = sorted(os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(GOLDEN_DIR, "*.json")))
+
+
+def test_fixtures_present():
+    assert CASES
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_html_matches_golden(name):
+    with open(os.path.join(GOLDEN_DIR, f"{name}.json"), encoding="utf-8") as handle:
+        resume_data = json.load(handle)
+    with open(os.path.join(GOLDEN_DIR, f"{name}.html"), encoding="utf-8", newline="") as handle:
+        expected = handle.read()
+
+    assert generate_html_resume(resume_data) == expected
@@ -0,0 +1,157 @@
+"""Provider routing under a deadline: attempt shares, circuit breaking and failover past a hung provider."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from mock_llm_server import SAMPLE_RESUME, MockLLMServer
+from streamlit_app import (ATTEMPT_HEADROOM, ATTEMPT_RESERVE_SECONDS, LLM_PROVIDERS, MIN_ATTEMPT_SECONDS,
+                           DeadlineExceededError, ProviderClient, ProviderRouter, ProvidersUnavailableError,
+                           attempt_deadline, attempt_share, call_llm_api_stream, check_deadline, deadline,
+                           ensure_providers_available, log_notify, parse_json_response, request_timeout,
+                           time_remaining)
+
+MODEL = "mock-model"
+
+
+def fake_clients(*names):
+    return {name: SimpleNamespace(model=MODEL, resolve_api_key=lambda api_key=None: "key") for name in names}
+
+
+def test_unknown_provider_gets_all_but_a_reserve():
+    assert attempt_share(45, None, 2) == 45 - ATTEMPT_RESERVE_SECONDS
+    # The last provider to try gets everything that is left
+    assert attempt_share(45, None, 0) == 45
+
+
+def test_known_provider_gets_an_even_split_or_its_headroom():
+    assert attempt_share(45, 2.0, 2) == 15
+    assert attempt_share(45, 20.0, 2) == 20.0 * ATTEMPT_HEADROOM
+
+
+def test_share_stays_within_the_budget():
+    assert attempt_share(3, 40.0, 2) == 3
+    assert attempt_share(2, None, 2) >= MIN_ATTEMPT_SECONDS
+    assert attempt_share(0.5, None, 2) == 0.5
+
+
+def test_nested_deadline_keeps_the_sooner():
+    with deadline(5):
+        with deadline(60):
+            assert time_remaining() <= 5
+
+
+def test_request_timeout_shrinks_to_the_attempt():
+    with deadline(30), attempt_deadline(2):
+        connect, read = request_timeout()
+    assert read <= 2 and connect <= 2
+
+
+def test_spent_budget_raises():
+    with deadline(0.5):
+        with pytest.raises(DeadlineExceededError):
+            check_deadline(MIN_ATTEMPT_SECONDS)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    router = ProviderRouter(failure_threshold=3)
+    clients = fake_clients("sambanova", "together")
+    for _ in range(2):
+        router.record_failure("sambanova", MODEL)
+    # Still in rotation, only ranked behind the provider that hasn't failed
+    assert router.order(clients) == (["together", "sambanova"], [])
+
+    router.record_failure("sambanova", MODEL)
+    assert router.order(clients) == (["together"], ["sambanova"])
+
+    router.close_circuit("sambanova", MODEL)
+    assert "sambanova" in router.order(clients)[0]
+
+
+def test_faster_provider_is_tried_first():
+    router = ProviderRouter()
+    router.record_success("sambanova", MODEL, 10.0, 5.0, 500)
+    router.record_success("together", MODEL, 2.0, 0.5, 500)
+    assert router.order(fake_clients("sambanova", "together"))[0] == ["together", "sambanova"]
+
+
+def test_every_circuit_open_fails_fast(monkeypatch):
+    router = ProviderRouter(failure_threshold=1)
+    clients = fake_clients("sambanova", "together")
+    for name in clients:
+        router.record_failure(name, MODEL)
+    monkeypatch.setattr("streamlit_app.get_provider_router", lambda: router)
+
+    with pytest.raises(ProvidersUnavailableError):
+        ensure_providers_available(clients)
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Start one mock server per provider; returns a function taking each provider's latency"""
+    servers = []
+    router = ProviderRouter()
+    monkeypatch.setattr("streamlit_app.get_provider_router", lambda: router)
+
+    def start(**latencies):
+        clients = {}
+        for name, config in LLM_PROVIDERS.items():
+            server = MockLLMServer(latency=latencies.get(name, 0.05), latency_sigma=0.0).start()
+            servers.append(server)
+            monkeypatch.setenv(f"{name.upper()}_API_URL", server.url)
+            monkeypatch.setenv(config["env_var"], "test-key")
+            clients[name] = ProviderClient(name, config)
+        monkeypatch.setattr("streamlit_app.get_provider_clients", lambda: clients)
+        return router, clients
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def generate(seconds, usage):
+    started = time.monotonic()
+    with deadline(seconds):
+        text = "".join(call_llm_api_stream("Backend engineer, 4 years of Python", api_provider="sambanova",
+                                           notify=log_notify, usage=usage))
+    return parse_json_response(text), time.monotonic() - started
+
+
+def failures(router, name, clients):
+    return router.stats[(name, clients[name].model)].consecutive_failures
+
+
+def test_hung_provider_fails_over_within_the_deadline(providers):
+    router, clients = providers(sambanova=30)
+    usage = {}
+    resume, elapsed = generate(3, usage)
+
+    assert resume == SAMPLE_RESUME
+    assert usage["provider"] != "sambanova"
+    assert elapsed < 3
+    # It has never answered, so running out of its share says nothing about its health yet
+    assert failures(router, "sambanova", clients) == 0
+
+
+def test_hang_counts_as_failure_once_typical_time_is_known(providers):
+    router, clients = providers(sambanova=30)
+    router.record_success("sambanova", clients["sambanova"].model, 0.2, 0.1, 500)
+    usage = {}
+    resume, _ = generate(3, usage)
+
+    assert resume == SAMPLE_RESUME
+    assert usage["provider"] != "sambanova"
+    assert failures(router, "sambanova", clients) == 1
+
+
+def test_slow_provider_without_stats_is_not_cut_off(providers):
+    # An even three-way split of the budget would stop it at ~1.3s
+    router, clients = providers(sambanova=1.5)
+    usage = {}
+    resume, _ = generate(4, usage)
+
+    assert resume == SAMPLE_RESUME
+    assert usage["provider"] == "sambanova"
+    assert router.answer_seconds("sambanova", clients["sambanova"].model) is not None